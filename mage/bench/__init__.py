@@ -0,0 +1,273 @@
+from __future__ import division
+
+import gc
+import importlib
+import os
+import sys
+import timeit
+import types
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+SUITES = ['mage.bench.reading',
+          'mage.bench.expansion',
+          'mage.bench.evaluation',
+          'mage.bench.datastructures',
+          'mage.bench.memory']
+
+# Target duration, in seconds, of a single timed sample.
+SAMPLE_TIME = 0.02
+
+benchmarks = []
+
+
+class Benchmark(object):
+    def __init__(self, name, setup):
+        self.name = name
+        self.setup = setup
+
+    def __str__(self):
+        return self.name
+
+
+class MemoryBenchmark(Benchmark):
+    pass
+
+
+def benchmark(name):
+    def decorator(setup):
+        benchmarks.append(Benchmark(name, setup))
+        return setup
+    return decorator
+
+
+def memory_benchmark(name):
+    # The setup function returns (build, count, shared): build creates the
+    # objects to measure, count is how many items they represent and shared
+    # lists pre-existing objects that must not be charged to them.
+    def decorator(setup):
+        benchmarks.append(MemoryBenchmark(name, setup))
+        return setup
+    return decorator
+
+
+def load(suites=None):
+    for suite in suites or SUITES:
+        importlib.import_module(suite)
+
+    return benchmarks
+
+
+def median(xs):
+    xs = sorted(xs)
+    mid = len(xs) // 2
+    if len(xs) % 2:
+        return xs[mid]
+
+    return (xs[mid - 1] + xs[mid]) / 2
+
+
+def calibrate(run):
+    start = timeit.default_timer()
+    run()
+    elapsed = timeit.default_timer() - start
+    if elapsed <= 0:
+        return 1000
+
+    return max(1, int(SAMPLE_TIME / elapsed))
+
+
+def sample(run, number):
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = timeit.default_timer()
+        for _ in xrange(number):
+            run()
+        return (timeit.default_timer() - start) / number
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+# ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def peak_rss(run):
+    # Runs once in a forked child, whose high-water RSS starts out fresh, so
+    # the growth is the peak of this run alone.
+    if resource is None or not hasattr(os, 'fork'):
+        return None
+
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(r)
+            before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            run()
+            after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            os.write(w, str((after - before) * RSS_UNIT))
+            status = 0
+        finally:
+            os._exit(status)
+
+    os.close(w)
+    with os.fdopen(r) as f:
+        data = f.read()
+    os.waitpid(pid, 0)
+
+    return int(data) if data else None
+
+
+def noop():
+    pass
+
+
+# Growth of a forked child that does nothing but measure itself: the pages it
+# touches just to run and report. Measured once, on first use.
+rss_overhead = None
+
+# malloc grows the heap in steps of 128 KiB, so any run that allocates at all
+# can look like it used one or two of them. Growth below this is reported as
+# unknown rather than as a misleading figure.
+RSS_RESOLUTION = 256 * 1024
+
+
+def peak_rss_growth(run):
+    global rss_overhead
+
+    if rss_overhead is None:
+        samples = [peak_rss(noop) for _ in xrange(3)]
+        rss_overhead = min(samples) if None not in samples else 0
+
+    peak = peak_rss(run)
+    if peak is None:
+        return None
+
+    growth = peak - rss_overhead
+    return growth if growth >= RSS_RESOLUTION else None
+
+
+def peak_memory(run):
+    if tracemalloc is None:
+        return peak_rss_growth(run)
+
+    gc.collect()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    else:
+        tracemalloc.reset_peak()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    return peak - baseline
+
+
+UNCOUNTED = (type, types.ModuleType, types.FunctionType,
+             types.BuiltinFunctionType)
+
+
+def retained_size(root, shared=()):
+    seen = set(id(x) for x in shared)
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, UNCOUNTED):
+            continue
+
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+
+    return total
+
+
+def retained_memory(build, shared):
+    if tracemalloc is None:
+        return retained_size(build(), shared)
+
+    gc.collect()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        retained = build()
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    del retained
+    return after - before
+
+
+def measure_memory(bench):
+    build, count, shared = bench.setup()
+    size = retained_memory(build, shared)
+    return {'bytes_per_item': size / count,
+            'count': count}
+
+
+def measure(bench, warmup=2, repeat=9):
+    if isinstance(bench, MemoryBenchmark):
+        return measure_memory(bench)
+
+    run = bench.setup()
+    for _ in xrange(warmup):
+        run()
+
+    number = calibrate(run)
+    timings = [sample(run, number) for _ in xrange(repeat)]
+
+    return {'median': median(timings),
+            'min': min(timings),
+            'max': max(timings),
+            'number': number,
+            'repeat': repeat,
+            'peak_memory': peak_memory(run)}
+
+
+def run(pattern=None, warmup=2, repeat=9):
+    results = {}
+    for bench in load():
+        if pattern is not None and pattern not in bench.name:
+            continue
+
+        results[bench.name] = measure(bench, warmup=warmup, repeat=repeat)
+
+    return results
+
+
+def compare(baseline, current, threshold=0.1):
+    regressions = []
+    for name, result in sorted(current.items()):
+        key = 'median' if 'median' in result else 'bytes_per_item'
+        base = baseline.get(name)
+        if base is None or not base.get(key):
+            continue
+
+        ratio = result[key] / base[key]
+        if ratio > 1 + threshold:
+            regressions.append((name, base[key], result[key], ratio))
+
+    return regressions
@@ -0,0 +1,85 @@
+from __future__ import print_function
+
+import argparse
+import json
+import platform
+import sys
+
+import mage.bench as bench
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if seconds * scale >= 1:
+            return '{:.3f} {}'.format(seconds * scale, unit)
+
+    return '{:.3f} ns'.format(seconds * 1e9)
+
+
+def format_memory(n):
+    if n is None:
+        return 'n/a'
+
+    return '{:.1f} KiB'.format(n / 1024.0)
+
+
+def format_bytes(n):
+    return '{:.1f} B'.format(n)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m mage.bench')
+    parser.add_argument('-k', '--filter', dest='pattern',
+                        help='only run benchmarks whose name contains this')
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=9)
+    parser.add_argument('--json', dest='json_path',
+                        help='write results to this file')
+    parser.add_argument('--compare', dest='baseline_path',
+                        help='compare against results from a previous run')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slowdown ratio reported as a regression')
+    args = parser.parse_args(argv)
+
+    results = bench.run(args.pattern, warmup=args.warmup, repeat=args.repeat)
+
+    width = max([len(name) for name in results] + [4])
+    print('{:<{}}  {:>12}  {:>12}  {:>12}'.format('name', width, 'median',
+                                                 'min', 'peak mem'))
+    for name, result in sorted(results.items()):
+        if 'bytes_per_item' in result:
+            print('{:<{}}  {:>12}  {:>12}  {:>12}'.format(
+                name, width, format_bytes(result['bytes_per_item']), '', ''))
+            continue
+
+        print('{:<{}}  {:>12}  {:>12}  {:>12}'.format(
+            name, width,
+            format_time(result['median']),
+            format_time(result['min']),
+            format_memory(result['peak_memory'])))
+
+    if args.json_path is not None:
+        with open(args.json_path, 'w') as f:
+            json.dump({'python': platform.python_version(),
+                       'results': results}, f, indent=2, sort_keys=True)
+
+    if args.baseline_path is not None:
+        with open(args.baseline_path) as f:
+            baseline = json.load(f)['results']
+
+        regressions = bench.compare(baseline, results, args.threshold)
+        for name, before, after, ratio in regressions:
+            fmt = format_time
+            if 'bytes_per_item' in results[name]:
+                fmt = format_bytes
+            print('REGRESSION {}: {} -> {} ({:.2f}x)'.format(
+                name, fmt(before), fmt(after), ratio))
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
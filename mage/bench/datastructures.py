@@ -0,0 +1,94 @@
+import mage.bench as bench
+import mage.hashmap as hashmap
+import mage.list as list
+import mage.serialize as serialize
+import mage.symbol as symbol
+import mage.typedvector as typedvector
+import mage.vector as vector
+
+N = 10000
+
+
+@bench.benchmark('list/build-10k')
+def list_build():
+    xs = range(N)
+    return lambda: list.List(xs)
+
+
+@bench.benchmark('list/concat-1k')
+def list_concat():
+    xs = range(1000)
+    return lambda: list.List(xs) + list.List(xs)
+
+
+@bench.benchmark('list/str-nested-1k')
+def list_str():
+    xs = list.List(list.List([i, symbol.Symbol('x')]) for i in xrange(1000))
+    return lambda: str(xs)
+
+
+@bench.benchmark('vector/index-10k')
+def vector_index():
+    v = vector.Vector(range(N))
+
+    def run():
+        for i in xrange(N):
+            v[i]
+    return run
+
+
+@bench.benchmark('vector/str-10k')
+def vector_str():
+    v = vector.Vector(range(N))
+    return lambda: str(v)
+
+
+@bench.benchmark('hashmap/build-10k')
+def hashmap_build():
+    pairs = [(symbol.Symbol('k{}'.format(i)), i) for i in xrange(N)]
+    return lambda: hashmap.HashMap(pairs)
+
+
+@bench.benchmark('hashmap/lookup-10k')
+def hashmap_lookup():
+    keys = [symbol.Symbol('k{}'.format(i)) for i in xrange(N)]
+    m = hashmap.HashMap((k, i) for i, k in enumerate(keys))
+
+    def run():
+        for k in keys:
+            m[k]
+    return run
+
+
+@bench.benchmark('typedvector/vdot-10k')
+def typedvector_dot():
+    v = typedvector.vector_of(':double', *range(N))
+    return lambda: typedvector.dot(v, v)
+
+
+@bench.benchmark('typedvector/add-10k')
+def typedvector_add():
+    v = typedvector.vector_of(':double', *range(N))
+    return lambda: typedvector.add(v, v)
+
+
+def records(n):
+    keys = [symbol.Symbol(':id'),
+            symbol.Symbol(':name'),
+            symbol.Symbol(':tags')]
+    return vector.Vector(
+        hashmap.HashMap(zip(keys, [i, 'name-{}'.format(i),
+                                   list.List([keys[0], keys[1]])]))
+        for i in xrange(n))
+
+
+@bench.benchmark('serialize/freeze-records-1k')
+def serialize_freeze():
+    data = records(1000)
+    return lambda: serialize.dumps(data)
+
+
+@bench.benchmark('serialize/thaw-records-1k')
+def serialize_thaw():
+    frozen = serialize.dumps(records(1000))
+    return lambda: serialize.loads(frozen)
@@ -0,0 +1,43 @@
+import mage.bench as bench
+import mage.namespace as namespace
+import mage.reader as reader
+import mage.symbol as symbol
+
+BENCH_NS = symbol.Symbol('mage.bench.evaluation')
+
+DEFINITIONS = [
+    '(def fib (fn [n] (if (< n 2) 1 (+ (fib (- n 1)) (fib (- n 2))))))',
+    '(def count-down (fn [n] (if (zero? n) n (count-down (- n 1)))))',
+    '(def square (fn [x] (* x x)))',
+    '(def even (fn [x] (zero? (mod x 2))))',
+]
+
+
+def prepare(source):
+    ns = namespace.Namespace.find_or_create(BENCH_NS)
+    for definition in DEFINITIONS:
+        reader.eval(reader.expand(reader.read_string(definition), ns), ns)
+
+    form = reader.expand(reader.read_string(source), ns)
+    return lambda: reader.eval(form, ns)
+
+
+@bench.benchmark('eval/fib-15')
+def eval_fib():
+    return prepare('(fib 15)')
+
+
+@bench.benchmark('eval/tail-loop-10k')
+def eval_tail_loop():
+    return prepare('(count-down 10000)')
+
+
+@bench.benchmark('eval/map-filter-reduce-1k')
+def eval_pipeline():
+    return prepare('(reduce + (map square (filter even (range 0 1000))))')
+
+
+@bench.benchmark('eval/inline-fn-pipeline-1k')
+def eval_inline_fn_pipeline():
+    return prepare('(reduce (fn [a b] (+ a b)) '
+                   '(map (fn [x] (* x x)) (range 0 1000)))')
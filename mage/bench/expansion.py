@@ -0,0 +1,74 @@
+import mage.bench as bench
+import mage.namespace as namespace
+import mage.reader as reader
+import mage.symbol as symbol
+
+BENCH_NS = symbol.Symbol('mage.bench.expansion')
+
+
+def nested_let(depth):
+    source = '(+ x0 1)'
+    for i in reversed(xrange(depth)):
+        source = '(let [x{} {}] {})'.format(i, i, source)
+    return source
+
+
+def nested_fn(depth):
+    source = '(+ x0 x{})'.format(depth - 1)
+    for i in reversed(xrange(depth)):
+        source = '(fn [x{}] {})'.format(i, source)
+    return source
+
+
+@bench.benchmark('expand/nested-let-50')
+def expand_nested_let():
+    ns = namespace.Namespace.find_or_create(BENCH_NS)
+    form = reader.read_string(nested_let(50))
+    return lambda: reader.expand_form(form, ns)
+
+
+@bench.benchmark('expand/nested-fn-100')
+def expand_nested_fn():
+    ns = namespace.Namespace.find_or_create(BENCH_NS)
+    form = reader.read_string(nested_fn(100))
+    return lambda: reader.expand_form(form, ns)
+
+
+def macro_file(count):
+    # A macro written in mage, so every use runs through the evaluator.
+    source = ['(defmacro bench-unless [] (fn [test then else] '
+              '(list (quote if) test else then)))']
+    for i in xrange(count):
+        source.append('(def f{} (fn [x] (bench-unless (< x {}) x '
+                      '(bench-unless (> x 0) (+ x 1) (- x 1)))))'.format(i, i))
+    return '\n'.join(source)
+
+
+@bench.benchmark('expand/reload-200')
+def expand_reload():
+    ns = namespace.Namespace.find_or_create(BENCH_NS)
+    source = macro_file(200)
+    reader.load_string(source, ns)
+
+    forms = list(reader.read_all(reader.Reader(iter(source), start_line=1)))
+    forms = forms[1:]  # Reloading the defmacro would flush the cache.
+
+    def reload():
+        for form in forms:
+            reader.expand(form, ns, cache=True)
+    return reload
+
+
+@bench.benchmark('expand/reload-200-uncached')
+def expand_reload_uncached():
+    ns = namespace.Namespace.find_or_create(BENCH_NS)
+    source = macro_file(200)
+    reader.load_string(source, ns)
+
+    forms = list(reader.read_all(reader.Reader(iter(source), start_line=1)))
+    forms = forms[1:]
+
+    def reload():
+        for form in forms:
+            reader.expand_form(form, ns)
+    return reload
@@ -0,0 +1,58 @@
+import mage.bench as bench
+import mage.namespace as namespace
+import mage.reader as reader
+import mage.symbol as symbol
+
+BENCH_NS = symbol.Symbol('mage.bench.memory')
+
+N = 10000
+
+
+@bench.memory_benchmark('memory/symbol')
+def symbol_size():
+    names = ['sym-{}'.format(i) for i in xrange(N)]
+    return (lambda: [symbol.Symbol(name) for name in names], N,
+            [names] + names)
+
+
+@bench.memory_benchmark('memory/quoted-symbol-10k')
+def quoted_symbols():
+    # Symbols as they appear in quoted data: few distinct, many repeated.
+    source = '[' + ' '.join('sym-{}'.format(i % 100) for i in xrange(N)) + ']'
+    return lambda: reader.read_string(source), N, []
+
+
+def config_records():
+    # Generated configuration: many records with repeated substructure.
+    records = ('{{:name "service-{}" :port 8080 :tags [:web :public] '
+               ':limits {{:cpu 2 :memory 512}}}}'.format(i % 10)
+               for i in xrange(N))
+    return '[' + ' '.join(records) + ']'
+
+
+@bench.memory_benchmark('memory/config-record-10k')
+def config():
+    source = config_records()
+    return lambda: reader.read_string(source), N, []
+
+
+@bench.memory_benchmark('memory/config-record-10k-consed')
+def config_consed():
+    source = config_records()
+    return lambda: reader.read_string(source, consing=True), N, []
+
+
+@bench.memory_benchmark('memory/call-frame-2')
+def call_frame():
+    ns = namespace.Namespace.find_or_create(BENCH_NS)
+    source = '(fn [a b] (fn [] (+ a b)))'
+    f = reader.eval(reader.expand(reader.read_string(source), ns), ns)
+
+    # The inner fn keeps the frame of the outer call alive; measure that
+    # frame, excluding what it shares with every other call.
+    def build():
+        return [f(1, 2).outer for _ in xrange(N)]
+
+    arity = f.arities.fixed[2]
+    shared = [ns, f, arity.params, arity.body] + list(arity.params)
+    return build, N, shared
@@ -0,0 +1,46 @@
+import mage.bench as bench
+import mage.reader as reader
+
+
+def flat_list(n):
+    return '(' + ' '.join(str(i) for i in xrange(n)) + ')'
+
+
+def symbols(n):
+    return '[' + ' '.join('sym-{}'.format(i % 100) for i in xrange(n)) + ']'
+
+
+def strings(n):
+    return '[' + ' '.join('"str\\t{}"'.format(i) for i in xrange(n)) + ']'
+
+
+def nested(depth, width):
+    if depth == 0:
+        return ' '.join(str(i) for i in xrange(width))
+
+    inner = nested(depth - 1, width)
+    return ' '.join('({} {{:k [{}]}})'.format(inner, i) for i in xrange(2))
+
+
+@bench.benchmark('read/flat-list-10k')
+def read_flat_list():
+    source = flat_list(10000)
+    return lambda: reader.read_string(source)
+
+
+@bench.benchmark('read/symbols-10k')
+def read_symbols():
+    source = symbols(10000)
+    return lambda: reader.read_string(source)
+
+
+@bench.benchmark('read/strings-5k')
+def read_strings():
+    source = strings(5000)
+    return lambda: reader.read_string(source)
+
+
+@bench.benchmark('read/nested-depth-8')
+def read_nested():
+    source = '(' + nested(8, 4) + ')'
+    return lambda: reader.read_string(source)
@@ -0,0 +1,116 @@
+import itertools
+import struct
+
+# Number of items decoded per struct call while iterating.
+CHUNK_SIZE = 4096
+
+BYTE_ORDERS = '@=<>!'
+
+
+def raw_buffer(obj):
+    if isinstance(obj, memoryview):
+        return obj, obj.format
+
+    fmt = getattr(obj, 'typecode', None)
+    if fmt is None:
+        try:
+            fmt = memoryview(obj).format
+        except TypeError:
+            fmt = 'B'
+
+    return buffer(obj), fmt
+
+
+class BufferView(object):
+    def __init__(self, obj, fmt=None):
+        if isinstance(obj, BufferView):
+            # The exported buffer doesn't carry the view's format.
+            fmt = fmt or obj.format
+            obj = obj.tobuffer()
+
+        self._buf, default_fmt = raw_buffer(obj)
+        self.format = fmt or default_fmt
+        self._struct = struct.Struct(self.format)
+        self.itemsize = self._struct.size
+
+        if isinstance(self._buf, memoryview):
+            nbytes = self._buf.itemsize
+            for n in self._buf.shape:
+                nbytes *= n
+        else:
+            nbytes = len(self._buf)
+
+        self._offset = 0
+        self._step = 1
+        self._len = nbytes // self.itemsize
+
+    def __len__(self):
+        return self._len
+
+    def __str__(self):
+        import mage.printer as printer  # Avoid circular imports.
+        return printer.to_str(self)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._slice(i)
+
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError('Index out of range: {}'.format(i))
+
+        offset = self._offset + i * self._step * self.itemsize
+        return self._struct.unpack_from(self._buf, offset)[0]
+
+    def _slice(self, s):
+        start, stop, step = s.indices(self._len)
+        view = object.__new__(BufferView)
+        view._buf = self._buf
+        view.format = self.format
+        view._struct = self._struct
+        view.itemsize = self.itemsize
+        view._offset = self._offset + start * self._step * self.itemsize
+        view._step = self._step * step
+        view._len = max(0, (stop - start + step - (1 if step > 0 else -1))
+                        // step)
+        return view
+
+    def __iter__(self):
+        if self._step != 1:
+            return (self[i] for i in xrange(self._len))
+
+        return itertools.chain.from_iterable(self._chunks())
+
+    def _chunks(self):
+        # Decode contiguous items a chunk at a time: the struct module does
+        # the unpacking in C and only one chunk is ever materialized.
+        order, code = '', self.format
+        if code[0] in BYTE_ORDERS:
+            order, code = code[0], code[1:]
+
+        offset = self._offset
+        remaining = self._len
+        chunk = struct.Struct(order + str(CHUNK_SIZE) + code)
+        while remaining > 0:
+            if remaining < CHUNK_SIZE:
+                chunk = struct.Struct(order + str(remaining) + code)
+            yield chunk.unpack_from(self._buf, offset)
+            offset += chunk.size
+            remaining -= CHUNK_SIZE
+
+    def tobuffer(self):
+        if self._step != 1:
+            raise ValueError('Only contiguous views can be exported')
+
+        size = self._len * self.itemsize
+        if isinstance(self._buf, memoryview):
+            itemsize = self._buf.itemsize
+            return self._buf[self._offset // itemsize:
+                             (self._offset + size) // itemsize]
+
+        return buffer(self._buf, self._offset, size)
+
+
+def view(obj, fmt=None):
+    return BufferView(obj, fmt)
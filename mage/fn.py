@@ -1,12 +1,19 @@
+import mage.profiler as profiler
 import mage.symbol as symbol
 import mage.var as var
 
 
+# Shared by every frame without bindings until something is interned in it.
+EMPTY_MAPPINGS = {}
+
+
 class Closure(object):
-    def __init__(self, name, outer):
-        self.name = name
+    __slots__ = ('fn', 'outer', '_mappings')
+
+    def __init__(self, fn, outer, mappings=EMPTY_MAPPINGS):
+        self.fn = fn
         self.outer = outer
-        self._mappings = {}
+        self._mappings = mappings
 
     def intern(self, sym):
         assert isinstance(sym, symbol.Symbol)
@@ -16,7 +23,9 @@ class Closure(object):
             return v
 
         if v is None:
-            v = var.Var(sym, self)
+            if self._mappings is EMPTY_MAPPINGS:
+                self._mappings = {}
+            v = var.Var(sym)
             self._mappings[sym] = v
 
         return v
@@ -30,26 +39,115 @@ class Closure(object):
 
         return v
 
+    def lookup_alias(self, alias):
+        # Aliases belong to the enclosing namespace.
+        return self.outer.lookup_alias(alias)
 
-class Fn(object):
-    def __init__(self, params, body, outer):
+    def add_alias(self, alias, ns):
+        self.outer.add_alias(alias, ns)
+
+
+class Arity(object):
+    __slots__ = ('params', 'rest', 'body')
+
+    def __init__(self, params, rest, body):
         self.params = params
+        self.rest = rest
         self.body = body
+
+    def __str__(self):
+        import mage.printer as printer  # Avoid circular imports.
+
+        params = [str(p) for p in self.params]
+        if self.rest is not None:
+            params += ['&', str(self.rest)]
+        return '([' + ' '.join(params) + '] ' + printer.to_str(self.body) + ')'
+
+
+class Arities(object):
+    __slots__ = ('fixed', 'variadic', 'position')
+
+    def __init__(self, arities, position=None):
+        self.variadic = None
+        self.position = position
+
+        max_fixed = -1
+        for arity in arities:
+            if arity.rest is None:
+                max_fixed = max(max_fixed, len(arity.params))
+            elif self.variadic is not None:
+                raise RuntimeError('Can\'t have more than 1 variadic overload')
+            else:
+                self.variadic = arity
+
+        # Indexed by argument count, so picking an arity is a list lookup.
+        self.fixed = [None] * (max_fixed + 1)
+        for arity in arities:
+            if arity.rest is not None:
+                continue
+
+            n = len(arity.params)
+            if self.fixed[n] is not None:
+                raise RuntimeError('Can\'t have 2 overloads with same arity')
+            self.fixed[n] = arity
+
+        if self.variadic is not None and \
+                len(self.variadic.params) < max_fixed:
+            raise RuntimeError('Can\'t have fixed arity function with more '
+                               'params than variadic function')
+
+    def __str__(self):
+        arities = [a for a in self.fixed if a is not None]
+        if self.variadic is not None:
+            arities.append(self.variadic)
+        return ' '.join(str(a) for a in arities)
+
+
+class Fn(object):
+    __slots__ = ('arities', 'outer', 'position', 'name')
+
+    def __init__(self, arities, outer):
+        self.arities = arities
         self.outer = outer
+        self.position = arities.position
+        self.name = None
 
     def __call__(self, *args):
-        import mage.reader as reader  # Avoid circular imports.
+        if profiler.current is not None:
+            return profiler.current.call(self, args)
+
+        return self.invoke(args)
+
+    def bind(self, args):
+        # Returns the body to evaluate for these arguments and the frame to
+        # evaluate it in.
+        n = len(args)
+        fixed = self.arities.fixed
+        arity = fixed[n] if n < len(fixed) else None
+        if arity is None:
+            arity = self.arities.variadic
+            if arity is None or n < len(arity.params):
+                err_fmt = 'Wrong number of args ({}) passed to fn'
+                raise TypeError(err_fmt.format(n))
+
+        if n == 0 and arity.rest is None:
+            return arity.body, Closure(self, self.outer)
 
-        expected_params = len(self.params)
-        received_args = len(args)
-        if expected_params != received_args:
-            err_fmt = 'fn takes exactly {} arguments ({} given)'
-            raise TypeError(err_fmt.format(expected_params, received_args))
+        mappings = {}
+        for param, arg in zip(arity.params, args):
+            mappings[param] = var.Var(param, arg)
 
-        fn_scope_sym = symbol.Symbol('fn__' + str(id(self)))
-        closure = Closure(fn_scope_sym, outer=self.outer)
-        for param, arg in zip(self.params, args):
-            v = closure.intern(param)
-            v.root = arg
+        if arity.rest is not None:
+            rest = None
+            if n > len(arity.params):
+                import mage.list as list  # Avoid circular imports.
+                rest = list.List(args[len(arity.params):])
+            mappings[arity.rest] = var.Var(arity.rest, rest)
+
+        return arity.body, Closure(self, self.outer, mappings)
+
+    def invoke(self, args):
+        import mage.reader as reader  # Avoid circular imports.
 
-        return reader.eval(self.body, closure)
+        body, closure = self.bind(args)
+        return reader.eval(body, closure)
@@ -0,0 +1,22 @@
+# The collections the reader builds. No per-instance __dict__: forms are
+# numerous and otherwise only ever carry a source position.
+SLOTS = ('_position', '__weakref__')
+
+
+class Form(object):
+    # Instance layout comes from the collection type mixed with; subclasses
+    # declare __slots__ = SLOTS.
+    __slots__ = ()
+
+    @property
+    def position(self):
+        # (source, line, column) of the form this was read from, if any.
+        return getattr(self, '_position', None)
+
+    @position.setter
+    def position(self, position):
+        self._position = position
+
+    def __str__(self):
+        import mage.printer as printer  # Avoid circular imports.
+        return printer.to_str(self)
@@ -1,4 +1,5 @@
-class HashMap(dict):
-    def __str__(self):
-        kv_str = ', '.join(str(k) + ' ' + str(v) for k, v in self.items())
-        return '{' + kv_str + '}'
+import mage.form as form
+
+
+class HashMap(form.Form, dict):
+    __slots__ = form.SLOTS
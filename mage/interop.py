@@ -0,0 +1,137 @@
+import importlib
+import operator
+import types
+
+import mage.symbol as symbol
+
+# A call site caches at most this many receiver types; past that it is
+# megamorphic and falls back to plain getattr.
+MAX_CACHED_TYPES = 4
+
+# Only plain functions and method descriptors can be called with the
+# receiver as their first argument. Data descriptors such as slots are
+# resolved before the type, so they are never cached.
+CACHEABLE = (types.FunctionType, type(str.upper), type(object.__init__))
+
+SLOT_WRAPPER = type(object.__getattribute__)
+
+MISSING = object()
+
+
+def unbound_method(t, name):
+    # Old-style classes have no __mro__ and are never cached.
+    mro = getattr(t, '__mro__', ())
+    for cls in mro:
+        # A __getattribute__ written in Python may answer anything.
+        attr = cls.__dict__.get('__getattribute__')
+        if attr is not None and type(attr) is not SLOT_WRAPPER:
+            return
+
+    for i, cls in enumerate(mro):
+        attr = cls.__dict__.get(name, MISSING)
+        if attr is MISSING:
+            continue
+
+        if not isinstance(attr, CACHEABLE):
+            return
+
+        # Class dict proxies are live views, so they can be kept.
+        shadows = tuple(c.__dict__ for c in mro[:i])
+        return shadows, cls.__dict__, attr
+
+
+class MethodCall(object):
+    def __init__(self, name):
+        self.name = name
+        self._cache = {}
+        self._type = None
+        self._entry = None
+        self._has_dict = False
+
+    def __str__(self):
+        return '.' + self.name
+
+    def __call__(self, obj, *args):
+        name = self.name
+        t = type(obj)
+        if t is not self._type:
+            entry = self._cache.get(t, MISSING)
+            if entry is MISSING:
+                entry = None
+                if len(self._cache) < MAX_CACHED_TYPES:
+                    entry = self._cache[t] = unbound_method(t, name)
+
+            if entry is None:
+                return getattr(obj, name)(*args)
+
+            self._type = t
+            self._entry = entry
+            self._has_dict = t.__dictoffset__ != 0
+
+        # Classes are mutable, so the hit is checked against them each time.
+        shadows, methods, method = self._entry
+        if methods.get(name) is not method or \
+                shadows and any(name in d for d in shadows):
+            del self._cache[t]
+            self._type = None
+            return getattr(obj, name)(*args)
+
+        # An instance attribute shadows a method of the same name.
+        if self._has_dict and name in obj.__dict__:
+            return getattr(obj, name)(*args)
+
+        return method(obj, *args)
+
+
+class FieldAccess(object):
+    def __init__(self, name):
+        self.name = name
+        self._get = operator.attrgetter(name)
+
+    def __str__(self):
+        return '.-' + self.name
+
+    def __call__(self, obj):
+        return self._get(obj)
+
+
+def is_interop(sym):
+    name = sym.name
+    if sym.ns is not None or len(name) < 2 or name == '..':
+        return False
+
+    return name[0] == '.' or name[-1] == '.'
+
+
+def call_site(sym):
+    name = sym.name
+    if name.startswith('.-'):
+        return FieldAccess(name[2:])
+
+    if name[0] == '.':
+        return MethodCall(name[1:])
+
+    # (Class. args) is a plain call of the class.
+    return symbol.Symbol(name[:-1])
+
+
+def import_module(sym, ns):
+    module = importlib.import_module(str(sym))
+    v = ns.intern(sym)
+    v.root = module
+    return module
+
+
+def resolve_dotted(sym, ns):
+    parts = sym.name.split('.')
+    for i in xrange(len(parts) - 1, 0, -1):
+        v = ns.find_interned_var(symbol.Symbol('.'.join(parts[:i])))
+        if v is None:
+            continue
+
+        obj = v.root
+        for part in parts[i:]:
+            obj = getattr(obj, part)
+        return obj
+
+    return MISSING
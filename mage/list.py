@@ -1,10 +1,11 @@
-class List(list):
-    def __str__(self):
-        return '(' + ' '.join(map(str, self)) + ')'
+import mage.form as form
 
-    def __add__(self, other):
-        # TODO: Fix O(N).
-        for x in other:
-            self.append(x)
 
-        return self
+class List(form.Form, list):
+    __slots__ = form.SLOTS
+
+    def __add__(self, other):
+        # Read forms may be shared, so neither operand is changed.
+        result = List(self)
+        result.extend(other)
+        return result
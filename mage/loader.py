@@ -0,0 +1,219 @@
+import multiprocessing
+import os
+
+import mage.list as list
+import mage.namespace as namespace
+import mage.reader as reader
+import mage.serialize as serialize
+import mage.symbol as symbol
+import mage.vector as vector
+
+# Directories searched for namespace sources, in order.
+path = [os.curdir]
+if os.environ.get('MAGE_PATH'):
+    path[:0] = os.environ['MAGE_PATH'].split(os.pathsep)
+
+SOURCE_EXT = '.mg'
+COMPILED_EXT = '.mgc'
+
+AS = symbol.Symbol.intern(':as')
+REQUIRE = symbol.Symbol.intern(':require')
+
+
+def relative_path(name):
+    # foo.bar-baz -> foo/bar_baz.mg
+    return name.name.replace('-', '_').replace('.', os.sep) + SOURCE_EXT
+
+
+def find_source(name):
+    relative = relative_path(name)
+    for directory in path:
+        source = os.path.join(directory, relative)
+        if os.path.isfile(source):
+            return source
+
+    err_fmt = 'Could not locate {} on the load path'
+    raise RuntimeError(err_fmt.format(relative))
+
+
+def compiled_path(source):
+    return os.path.splitext(source)[0] + COMPILED_EXT
+
+
+def is_stale(source):
+    try:
+        compiled = os.path.getmtime(compiled_path(source))
+    except OSError:
+        return True
+
+    return compiled < os.path.getmtime(source)
+
+
+def read_source(source):
+    with open(source) as f:
+        r = reader.Reader(iter(f.read()), start_line=1, source=source)
+        return [form for form in reader.read_all(r)]
+
+
+def read_forms(source):
+    if not is_stale(source):
+        try:
+            with open(compiled_path(source), 'rb') as f:
+                return serialize.load(f)
+        except (IOError, EOFError, ValueError):
+            # Unreadable or truncated; fall back to the source.
+            pass
+
+    return read_source(source)
+
+
+def compile_file(source):
+    forms = list.List(read_source(source))
+
+    # Write then rename, so concurrent loads never see a partial file.
+    compiled = compiled_path(source)
+    tmp = '{}.{}'.format(compiled, os.getpid())
+    with open(tmp, 'wb') as f:
+        serialize.dump(forms, f)
+    os.rename(tmp, compiled)
+
+    return compiled
+
+
+def load(source, ns):
+    return reader.load_forms(read_forms(source), ns, cache=True)
+
+
+def unquote(form):
+    if isinstance(form, list.List) and len(form) == 2 and \
+            form[0] == reader.QUOTE:
+        return form[1]
+
+    return form
+
+
+def parse_spec(spec):
+    # foo.bar, [foo.bar] or [foo.bar :as fb]
+    spec = unquote(spec)
+    if isinstance(spec, symbol.Symbol):
+        return spec, None
+
+    if isinstance(spec, vector.Vector) and spec and \
+            isinstance(spec[0], symbol.Symbol):
+        if len(spec) == 1:
+            return spec[0], None
+        elif len(spec) == 3 and spec[1] == AS and \
+                isinstance(spec[2], symbol.Symbol):
+            return spec[0], spec[2]
+
+    raise RuntimeError('Invalid require spec: {}'.format(spec))
+
+
+def require(spec, ns):
+    name, alias = parse_spec(spec)
+
+    target = namespace.Namespace.find(name)
+    if target is None:
+        # Located first, so a missing file doesn't leave an empty namespace
+        # behind for a later require to find.
+        source = find_source(name)
+        target = namespace.Namespace(name)
+
+        # Loaded the first time one of its Vars is resolved.
+        target.pending = source
+
+    if alias is not None:
+        ns.add_alias(alias, target)
+
+    return target
+
+
+def ns_requires(form):
+    if not isinstance(form, list.List) or len(form) < 2 or \
+            form[0] != reader.NS:
+        return []
+
+    names = []
+    for clause in form[2:]:
+        if isinstance(clause, list.List) and clause and clause[0] == REQUIRE:
+            names.extend(parse_spec(spec)[0] for spec in clause[1:])
+
+    return names
+
+
+def define_ns(form):
+    # (ns foo.bar (:require baz [qux :as q]))
+    if len(form) < 2 or not isinstance(form[1], symbol.Symbol):
+        raise RuntimeError('ns requires a symbol name')
+
+    target = namespace.Namespace.find_or_create(form[1])
+    for clause in form[2:]:
+        if not isinstance(clause, list.List) or not clause or \
+                clause[0] != REQUIRE:
+            raise RuntimeError('Unsupported ns clause: {}'.format(clause))
+
+        for spec in clause[1:]:
+            require(spec, target)
+
+    return target
+
+
+def dependencies(source):
+    # Only the leading ns form needs to be read.
+    with open(source) as f:
+        r = reader.Reader(iter(f.read()), start_line=1, source=source)
+        return ns_requires(reader.read(r, eof_value=reader.EOF))
+
+
+def graph(names):
+    deps = {}
+    stack = [name for name in names]
+    while stack:
+        name = stack.pop()
+        if name not in deps:
+            deps[name] = dependencies(find_source(name))
+            stack.extend(deps[name])
+
+    return deps
+
+
+def load_order(names):
+    deps = graph(names)
+    order = []
+    state = {}
+
+    def visit(name, chain):
+        if state.get(name) == 'done':
+            return
+        elif state.get(name) == 'visiting':
+            cycle = ' -> '.join(str(n) for n in chain + [name])
+            raise RuntimeError('Cyclic load dependency: ' + cycle)
+
+        state[name] = 'visiting'
+        for dep in deps[name]:
+            visit(dep, chain + [name])
+        state[name] = 'done'
+        order.append(name)
+
+    for name in names:
+        visit(name, [])
+
+    return order
+
+
+def precompile(names, processes=None):
+    # Reading dominates load time and doesn't depend on other namespaces,
+    # so every stale file in the graph is compiled in parallel.
+    sources = [find_source(name) for name in load_order(names)]
+    stale = [source for source in sources if is_stale(source)]
+    if len(stale) > 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            pool.map(compile_file, stale)
+        finally:
+            pool.close()
+            pool.join()
+    elif stale:
+        compile_file(stale[0])
+
+    return sources
@@ -1,10 +1,19 @@
 from __future__ import print_function
 
+import bisect
+import functools
+import math
 import operator
+import sys
 
+import mage.bufferview as bufferview
 import mage.list as list
+import mage.printer as printer
+import mage.serialize as serialize
 import mage.symbol as symbol
+import mage.typedvector as typedvector
 import mage.var as var
+import mage.vector as vector
 
 
 def successive_comp(xs, comparator):
@@ -18,6 +27,22 @@ def successive_comp(xs, comparator):
     return all(b for b in bs)
 
 
+def count(coll):
+    if coll is None:
+        return 0
+
+    return len(coll)
+
+
+def subvec(v, start, end=None):
+    # Buffer views slice without copying; vectors copy like Python lists do.
+    sub = v[start:end]
+    if isinstance(v, vector.Vector):
+        return vector.Vector(sub)
+
+    return sub
+
+
 # Builtins.
 ADD = var.Var(symbol.Symbol('+'))
 ADD.root = lambda *xs: reduce(operator.add, xs)
@@ -55,6 +80,18 @@ MOD.root = lambda a, b: a % b
 ZEROQ = var.Var(symbol.Symbol('zero?'))
 ZEROQ.root = lambda x: x == 0
 
+INC = var.Var(symbol.Symbol('inc'))
+INC.root = functools.partial(operator.add, 1)
+
+DEC = var.Var(symbol.Symbol('dec'))
+DEC.root = functools.partial(operator.add, -1)
+
+ABS = var.Var(symbol.Symbol('abs'))
+ABS.root = abs
+
+SQRT = var.Var(symbol.Symbol('sqrt'))
+SQRT.root = math.sqrt
+
 LIST = var.Var(symbol.Symbol('list'))
 LIST.root = lambda *xs: list.List(xs)
 
@@ -73,15 +110,76 @@ REDUCE.root = reduce
 RANGE = var.Var(symbol.Symbol('range'))
 RANGE.root = range
 
+NTH = var.Var(symbol.Symbol('nth'))
+NTH.root = operator.getitem
+
+COUNT = var.Var(symbol.Symbol('count'))
+COUNT.root = count
+
+SUBVEC = var.Var(symbol.Symbol('subvec'))
+SUBVEC.root = subvec
+
+BUFFER_VIEW = var.Var(symbol.Symbol('buffer-view'))
+BUFFER_VIEW.root = bufferview.view
+
+FREEZE = var.Var(symbol.Symbol('freeze'))
+FREEZE.root = serialize.dumps
+
+THAW = var.Var(symbol.Symbol('thaw'))
+THAW.root = serialize.loads
+
+VECTOR_OF = var.Var(symbol.Symbol('vector-of'))
+VECTOR_OF.root = typedvector.vector_of
+
+VADD = var.Var(symbol.Symbol('v+'))
+VADD.root = typedvector.add
+
+VMUL = var.Var(symbol.Symbol('v*'))
+VMUL.root = typedvector.mul
+
+VSUM = var.Var(symbol.Symbol('vsum'))
+VSUM.root = typedvector.vsum
+
+VDOT = var.Var(symbol.Symbol('vdot'))
+VDOT.root = typedvector.dot
+
+VMAP = var.Var(symbol.Symbol('vmap'))
+VMAP.root = typedvector.vmap
+
 
 def print_xs(*xs):
     for x in xs:
-        print(x)
+        printer.prn(x, readably=False)
+
+
+def pr_xs(*xs):
+    for i, x in enumerate(xs):
+        if i > 0:
+            sys.stdout.write(' ')
+        printer.pr(x)
+
+
+def prn_xs(*xs):
+    pr_xs(*xs)
+    sys.stdout.write('\n')
+
+
+def pr_str_xs(*xs):
+    return ' '.join(printer.pr_str(x) for x in xs)
 
 
 PRINT = var.Var(symbol.Symbol('print'))
 PRINT.root = print_xs
 
+PR = var.Var(symbol.Symbol('pr'))
+PR.root = pr_xs
+
+PRN = var.Var(symbol.Symbol('prn'))
+PRN.root = prn_xs
+
+PR_STR = var.Var(symbol.Symbol('pr-str'))
+PR_STR.root = pr_str_xs
+
 BUILTINS = {ADD.sym: ADD,
             SUB.sym: SUB,
             MUL.sym: MUL,
@@ -94,24 +192,69 @@ BUILTINS = {ADD.sym: ADD,
             GE.sym: GE,
             MOD.sym: MOD,
             ZEROQ.sym: ZEROQ,
+            INC.sym: INC,
+            DEC.sym: DEC,
+            ABS.sym: ABS,
+            SQRT.sym: SQRT,
             LIST.sym: LIST,
             LISTQ.sym: LISTQ,
             MAP.sym: MAP,
             FILTER.sym: FILTER,
             REDUCE.sym: REDUCE,
             RANGE.sym: RANGE,
-            PRINT.sym: PRINT}
+            NTH.sym: NTH,
+            COUNT.sym: COUNT,
+            SUBVEC.sym: SUBVEC,
+            BUFFER_VIEW.sym: BUFFER_VIEW,
+            FREEZE.sym: FREEZE,
+            THAW.sym: THAW,
+            VECTOR_OF.sym: VECTOR_OF,
+            VADD.sym: VADD,
+            VMUL.sym: VMUL,
+            VSUM.sym: VSUM,
+            VDOT.sym: VDOT,
+            VMAP.sym: VMAP,
+            PRINT.sym: PRINT,
+            PR.sym: PR,
+            PRN.sym: PRN,
+            PR_STR.sym: PR_STR,
+            printer.PRINT_LENGTH.sym: printer.PRINT_LENGTH,
+            printer.PRINT_LEVEL.sym: printer.PRINT_LEVEL}
+
+# Names of the builtins, sorted, which every namespace's index starts from.
+BUILTIN_NAMES = sorted(sym.name for sym in BUILTINS)
 
 namespaces = {}
 
 
+def prefixed(names, prefix):
+    # names is sorted, so matches are contiguous.
+    i = bisect.bisect_left(names, prefix)
+    matches = []
+    while i < len(names) and names[i].startswith(prefix):
+        matches.append(names[i])
+        i += 1
+
+    return matches
+
+
 class Namespace(object):
+    __slots__ = ('name', '_mappings', '_aliases', '_names', '_alias_names',
+                 'pending')
+
     def __init__(self, name):
         assert isinstance(name, symbol.Symbol)
         self.name = name
         self._mappings = BUILTINS.copy()
         self._aliases = {}
 
+        # Sorted names of mappings and aliases, for prefix queries.
+        self._names = BUILTIN_NAMES[:]
+        self._alias_names = []
+
+        # Source file to load the first time a Var is resolved, if any.
+        self.pending = None
+
         if name not in namespaces:
             namespaces[name] = self
 
@@ -133,13 +276,29 @@ class Namespace(object):
             v = var.Var(sym, self)
             self._mappings[sym] = v
             v.ns = self
+            bisect.insort(self._names, sym.name)
 
         return v
 
     def find_interned_var(self, sym):
         assert isinstance(sym, symbol.Symbol)
+        if self.pending is not None:
+            self.load()
+
         return self._mappings.get(sym)
 
+    def load(self):
+        import mage.loader as loader  # Avoid circular imports.
+
+        # Cleared first, so lookups made while loading don't recurse.
+        source, self.pending = self.pending, None
+        try:
+            loader.load(source, self)
+        except:
+            # A failed load is retried by the next lookup.
+            self.pending = source
+            raise
+
     def reference(self, sym, val):
         assert isinstance(sym, symbol.Symbol)
 
@@ -150,6 +309,8 @@ class Namespace(object):
         if v == val:
             return v
 
+        if sym not in self._mappings:
+            bisect.insort(self._names, sym.name)
         self._mappings[sym] = val
 
         return val
@@ -169,6 +330,42 @@ class Namespace(object):
 
         if alias not in self._aliases:
             self._aliases[alias] = ns
+            bisect.insort(self._alias_names, alias.name)
+
+    def mappings(self):
+        return dict(self._mappings)
+
+    def interns(self):
+        return dict((sym, v) for sym, v in self._mappings.iteritems()
+                    if isinstance(v, var.Var) and v.ns is self)
+
+    def aliases(self):
+        return dict(self._aliases)
+
+    def complete(self, prefix):
+        # Names mapped in this namespace or aliased by it that start with
+        # prefix, in order; alias/prefix completes Vars interned in the
+        # aliased namespace.
+        alias, slash, name = prefix.partition('/')
+        if slash and alias:
+            target = self.lookup_alias(symbol.Symbol(alias))
+            if target is None:
+                target = Namespace.find(symbol.Symbol(alias))
+            if target is None:
+                return []
+
+            if target.pending is not None:
+                target.load()
+
+            return [alias + '/' + n for n in prefixed(target._names, name)
+                    if target.is_interned(n)]
+
+        aliases = [n + '/' for n in prefixed(self._alias_names, prefix)]
+        return sorted(prefixed(self._names, prefix) + aliases)
+
+    def is_interned(self, name):
+        v = self._mappings.get(symbol.Symbol(name))
+        return isinstance(v, var.Var) and v.ns is self
 
     @staticmethod
     def find(name):
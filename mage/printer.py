@@ -0,0 +1,314 @@
+import __builtin__
+import fractions
+import itertools
+import re
+import sys
+
+import mage.bufferview as bufferview
+import mage.hashmap as hashmap
+import mage.list as list
+import mage.symbol as symbol
+import mage.typedvector as typedvector
+import mage.var as var
+import mage.vector as vector
+
+PRINT_LENGTH = var.Var(symbol.Symbol('*print-length*'))
+PRINT_LEVEL = var.Var(symbol.Symbol('*print-level*'))
+
+string_escapes = {'"': '\\"',
+                  '\\': '\\\\',
+                  '\t': '\\t',
+                  '\r': '\\r',
+                  '\n': '\\n',
+                  '\b': '\\b',
+                  '\f': '\\f'}
+
+escape_pattern = re.compile('["\\\\\t\r\n\b\f]')
+
+# Sequences are realized and printed this many items at a time.
+BATCH_SIZE = 1024
+
+# Below this many items a single join of atoms saves less than checking for
+# one costs.
+SMALL_SIZE = 8
+
+# Types whose printed form is a single function call away. Checked by exact
+# type before anything else since most of what gets printed is atoms.
+atoms = {int: str,
+         long: str,
+         float: repr,
+         symbol.Symbol: str}
+
+delimiters = {list.List: ('(', ')'),
+              vector.Vector: ('[', ']'),
+              typedvector.TypedVector: ('[', ']')}
+
+UNSET = object()
+
+
+def identity(x):
+    return x
+
+
+def escape(match):
+    return string_escapes[match.group()]
+
+
+def escape_string(s):
+    return '"' + escape_pattern.sub(escape, s) + '"'
+
+
+def with_strings(str_fn):
+    table = atoms.copy()
+    table[str] = table[unicode] = str_fn
+    return table
+
+
+readable_atoms = with_strings(escape_string)
+plain_atoms = with_strings(identity)
+
+# Atoms printed by plain str(), which can share a join whatever their mix.
+readable_str_atoms = frozenset([int, long, symbol.Symbol])
+plain_str_atoms = readable_str_atoms | frozenset([str])
+
+
+def batches(xs):
+    it = iter(xs)
+    while True:
+        batch = __builtin__.list(itertools.islice(it, BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def is_lazy(x):
+    # Iterators and generators are printed without realizing more of them
+    # than *print-length* allows.
+    return hasattr(x, 'next') and iter(x) is x
+
+
+class Printer(object):
+    def __init__(self, write, readably=True, length=UNSET, level=UNSET):
+        if length is UNSET:
+            length = PRINT_LENGTH.root
+        if level is UNSET:
+            level = PRINT_LEVEL.root
+
+        self.write = write
+        self.readably = readably
+        self.length = length
+        self.level = level
+
+        if readably:
+            self.atoms, self.str_atoms = readable_atoms, readable_str_atoms
+        else:
+            self.atoms, self.str_atoms = plain_atoms, plain_str_atoms
+
+    def pr(self, x, depth=0):
+        write = self.write
+
+        atom_str = self.atoms.get(type(x))
+        if atom_str is not None:
+            write(atom_str(x))
+            return
+
+        delimited = delimiters.get(type(x))
+        if delimited is not None:
+            self.pr_seq(delimited[0], x, delimited[1], depth)
+        elif x is None:
+            write('nil')
+        elif x is True:
+            write('true')
+        elif x is False:
+            write('false')
+        elif isinstance(x, basestring):
+            write(self.atoms[str](x))
+        elif isinstance(x, list.List):
+            self.pr_seq('(', x, ')', depth)
+        elif isinstance(x, (vector.Vector,
+                            typedvector.TypedVector,
+                            bufferview.BufferView)):
+            self.pr_seq('[', x, ']', depth)
+        elif isinstance(x, (hashmap.HashMap, dict)):
+            self.pr_map(x, depth)
+        elif isinstance(x, (set, frozenset)):
+            self.pr_seq('#{', x, '}', depth)
+        elif isinstance(x, (tuple, __builtin__.list)) or is_lazy(x):
+            self.pr_seq('(', x, ')', depth)
+        elif isinstance(x, float):
+            write(repr(x))
+        elif isinstance(x, fractions.Fraction):
+            write(str(x.numerator) + '/' + str(x.denominator))
+        else:
+            write(str(x))
+
+    def pr_seq(self, begin, xs, end, depth):
+        if self.level is not None and depth >= self.level:
+            self.write('#')
+            return
+
+        write = self.write
+        length = self.length
+        if length is None and isinstance(xs, (tuple, __builtin__.list)) \
+                and len(xs) <= BATCH_SIZE:
+            # Small realized sequences, which most nested ones are, skip the
+            # batching altogether.
+            joined = self.join_atoms(xs)
+            if joined is not None:
+                write(begin + joined + end)
+            else:
+                write(begin)
+                self.pr_each(xs, '', depth)
+                write(end)
+            return
+
+        typed = isinstance(xs, typedvector.TypedVector)
+        if length is not None:
+            xs = batches(itertools.islice(xs, length + 1))
+        else:
+            xs = batches(xs)
+
+        write(begin)
+        sep = ''
+        printed = 0
+        for batch in xs:
+            truncated = length is not None and printed + len(batch) > length
+            if truncated:
+                batch = batch[:length - printed]
+            printed += len(batch)
+
+            if batch:
+                # Typed vectors only ever hold numbers of their one type.
+                if typed:
+                    joined = ' '.join(map(self.atoms[type(batch[0])], batch))
+                else:
+                    joined = self.join_atoms(batch)
+
+                if joined is not None:
+                    write(sep + joined)
+                else:
+                    self.pr_each(batch, sep, depth)
+                sep = ' '
+
+            if truncated:
+                write(sep + '...')
+                break
+        write(end)
+
+    def join_atoms(self, xs):
+        # Atoms are formatted with a single join, provided they share a type
+        # or are all printed by str().
+        if not xs:
+            return ''
+
+        atom_str = self.atoms.get(type(xs[0]))
+        if atom_str is None:
+            return None
+
+        types = set(itertools.imap(type, xs))
+        if len(types) > 1:
+            if not types <= self.str_atoms:
+                return None
+            atom_str = str
+
+        return ' '.join(map(atom_str, xs))
+
+    def pr_each(self, xs, sep, depth):
+        write = self.write
+        atoms = self.atoms
+        for x in xs:
+            atom_str = atoms.get(type(x))
+            if atom_str is not None:
+                write(sep + atom_str(x))
+            else:
+                write(sep)
+                delimited = delimiters.get(type(x))
+                if delimited is not None:
+                    self.pr_seq(delimited[0], x, delimited[1], depth + 1)
+                else:
+                    self.pr(x, depth + 1)
+            sep = ' '
+
+    def format(self, x):
+        # Without *print-length* or *print-level* nothing is cut short, and
+        # building nested strings is cheaper than writing each piece.
+        atom_str = self.atoms.get(type(x))
+        if atom_str is not None:
+            return atom_str(x)
+
+        delimited = delimiters.get(type(x))
+        if delimited is not None:
+            joined = None
+            if len(x) > SMALL_SIZE:
+                joined = self.join_atoms(x)
+            if joined is None:
+                joined = ' '.join(self.format_all(x))
+            return delimited[0] + joined + delimited[1]
+        elif type(x) is hashmap.HashMap or type(x) is dict:
+            kvs = self.format_all(itertools.chain.from_iterable(x.iteritems()))
+            pairs = map(' '.join, zip(kvs[::2], kvs[1::2]))
+            return '{' + ', '.join(pairs) + '}'
+        elif x is None:
+            return 'nil'
+        elif x is True:
+            return 'true'
+        elif x is False:
+            return 'false'
+
+        chunks = []
+        Printer(chunks.append, self.readably, None, None).pr(x)
+        return ''.join(chunks)
+
+    def format_all(self, xs):
+        atoms = self.atoms
+        format = self.format
+        return [atoms[type(x)](x) if type(x) in atoms else format(x)
+                for x in xs]
+
+    def pr_map(self, m, depth):
+        if self.level is not None and depth >= self.level:
+            self.write('#')
+            return
+
+        write = self.write
+        write('{')
+        for i, (k, v) in enumerate(m.iteritems()):
+            if i > 0:
+                write(', ')
+            if self.length is not None and i == self.length:
+                write('...')
+                break
+            self.pr(k, depth + 1)
+            write(' ')
+            self.pr(v, depth + 1)
+        write('}')
+
+
+def pr(x, stream=None, readably=True, length=UNSET, level=UNSET):
+    if stream is None:
+        stream = sys.stdout
+
+    Printer(stream.write, readably, length, level).pr(x)
+
+
+def prn(x, stream=None, readably=True, length=UNSET, level=UNSET):
+    if stream is None:
+        stream = sys.stdout
+
+    pr(x, stream, readably, length, level)
+    stream.write('\n')
+
+
+def pr_str(x, readably=True, length=UNSET, level=UNSET):
+    chunks = []
+    printer = Printer(chunks.append, readably, length, level)
+    if printer.length is None and printer.level is None:
+        return printer.format(x)
+
+    printer.pr(x)
+    return ''.join(chunks)
+
+
+def to_str(x):
+    # str() always prints the whole value, whatever *print-length* says.
+    return pr_str(x, readably=False, length=None, level=None)
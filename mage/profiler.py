@@ -0,0 +1,183 @@
+from __future__ import division
+
+import gc
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# The active profiler, if any. The evaluator checks this on every call so it
+# must stay a plain module attribute.
+current = None
+
+timer = timeit.default_timer
+
+
+def label(f):
+    if f.name is not None:
+        v = f.name
+        if v.ns is not None:
+            return str(v.ns) + '/' + str(v.sym)
+        return str(v.sym)
+
+    if f.position is not None:
+        source, line, column = f.position
+        return 'fn@{}:{}:{}'.format(source or 'NO_SOURCE_FILE', line, column)
+
+    return 'fn__' + str(id(f.arities))
+
+
+def traced_memory():
+    if tracemalloc is None or not tracemalloc.is_tracing():
+        return None
+
+    return tracemalloc.get_traced_memory()[0]
+
+
+def allocated_objects():
+    # Objects tracked by the cyclic GC allocated, net of deallocations, since
+    # the last collection. Only meaningful while automatic collection is off.
+    return gc.get_count()[0]
+
+
+class Stats(object):
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.allocated = None
+
+    def add_allocated(self, n):
+        if n is None:
+            return
+
+        self.allocated = (self.allocated or 0) + n
+
+
+class Frame(object):
+    def __init__(self, owner, name, parent, start, memory):
+        self.owner = owner
+        self.name = name
+        self.parent = parent
+        self.start = start
+        self.memory = memory
+        self.children = 0.0
+        self.path = name if parent is None else parent.path + ';' + name
+
+
+class Profiler(object):
+    def __init__(self):
+        self.stats = {}
+        self.stacks = {}
+        self.top = None
+        self._active = {}
+
+        self.memory = traced_memory
+        self.unit = 'B'
+        self._gc_enabled = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def enable(self):
+        global current
+        current = self
+
+        # Without tracemalloc, count objects instead of bytes, keeping the
+        # collector from resetting the count in the middle of a call.
+        if traced_memory() is None and self._gc_enabled is None:
+            self.memory = allocated_objects
+            self.unit = 'objects'
+            self._gc_enabled = gc.isenabled()
+            gc.disable()
+
+    def disable(self):
+        global current
+        if current is self:
+            current = None
+
+        if self._gc_enabled:
+            gc.enable()
+        self._gc_enabled = None
+
+    def enter(self, f):
+        name = label(f)
+        self._active[name] = self._active.get(name, 0) + 1
+        self.top = Frame(self, name, self.top, timer(), self.memory())
+        return self.top
+
+    def leave(self, frame):
+        elapsed = timer() - frame.start
+
+        stats = self.stats.get(frame.name)
+        if stats is None:
+            stats = self.stats[frame.name] = Stats(frame.name)
+
+        stats.calls += 1
+        stats.exclusive += elapsed - frame.children
+
+        # Recursive calls are already covered by the outermost frame.
+        self._active[frame.name] -= 1
+        if self._active[frame.name] == 0:
+            stats.inclusive += elapsed
+
+        if frame.memory is not None:
+            memory = self.memory()
+            if memory is not None:
+                stats.add_allocated(memory - frame.memory)
+
+        self.stacks[frame.path] = \
+            self.stacks.get(frame.path, 0.0) + elapsed - frame.children
+
+        self.top = frame.parent
+        if self.top is not None:
+            self.top.children += elapsed
+
+    def call(self, f, args):
+        frame = self.enter(f)
+        try:
+            return f.invoke(args)
+        finally:
+            self.leave(frame)
+
+    def tail_call(self, frame, f):
+        # A tail call replaces the caller's frame rather than nesting in it.
+        if frame is not None:
+            frame.owner.leave(frame)
+
+        return self.enter(f)
+
+    def report(self, stream=None, sort='exclusive', limit=None):
+        if stream is None:
+            stream = sys.stdout
+
+        rows = sorted(self.stats.values(),
+                      key=lambda s: getattr(s, sort),
+                      reverse=True)
+        if limit is not None:
+            rows = rows[:limit]
+
+        header = '{:>10}  {:>12}  {:>12}  {:>12}  {}\n'
+        stream.write(header.format('calls', 'incl (ms)', 'excl (ms)',
+                                   'alloc ({})'.format(self.unit), 'fn'))
+        for s in rows:
+            allocated = 'n/a' if s.allocated is None else str(s.allocated)
+            stream.write('{:>10}  {:>12.3f}  {:>12.3f}  {:>12}  {}\n'.format(
+                s.calls, s.inclusive * 1e3, s.exclusive * 1e3, allocated,
+                s.name))
+
+    def collapsed(self, stream=None):
+        if stream is None:
+            stream = sys.stdout
+
+        # Flamegraph tooling expects integer sample weights; use microseconds.
+        for path, elapsed in sorted(self.stacks.items()):
+            stream.write('{} {}\n'.format(path, int(round(elapsed * 1e6))))
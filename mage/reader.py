@@ -2,11 +2,14 @@ import collections
 import fractions
 import re
 import sys
+import weakref
 
 import mage.fn as fn
 import mage.hashmap as hashmap
+import mage.interop as interop
 import mage.list as list
 import mage.namespace as namespace
+import mage.profiler as profiler
 import mage.rt as rt
 import mage.symbol as symbol
 import mage.vector as vector
@@ -51,33 +54,55 @@ DEFMACRO = symbol.Symbol.intern('defmacro')
 LET = symbol.Symbol.intern('let')
 DO = symbol.Symbol.intern('do')
 IF = symbol.Symbol.intern('if')
+TIME = symbol.Symbol.intern('time')
+IMPORT = symbol.Symbol.intern('import')
+NS = symbol.Symbol.intern('ns')
+REQUIRE = symbol.Symbol.intern('require')
 
 FN = symbol.Symbol.intern('fn')
 QUOTE = symbol.Symbol.intern('quote')
 SYNTAX_QUOTE = symbol.Symbol.intern('`')
 UNQUOTE = symbol.Symbol.intern('~')
 UNQUOTE_SPLICE = symbol.Symbol.intern('~@')
+AMPERSAND = symbol.Symbol.intern('&')
+
+
+# Returned by read at the end of input when no other eof_value is wanted.
+EOF = object()
 
 
 class ReaderError(Exception):
     pass
 
 
+def count_lines(text):
+    # \n, \r\n and a lone \r are each one line break, as in Reader.next.
+    return text.count('\n') + text.count('\r') - text.count('\r\n')
+
+
 class Reader(object):
     def __init__(self,
                  stream,
                  start_line=-1,
                  start_column=0,
-                 line_delims=None):
+                 line_delims=None,
+                 source=None,
+                 consing=False):
         self._stream = stream
         self._queue = collections.deque()
         self._queue_len = 0
 
         self.line = start_line
         self.column = start_column
+        self.source = source
+        self.consing = consing
 
         if line_delims is None:
-            self._line_delims = {'\n', '\r'}
+            line_delims = {'\n', '\r'}
+        self._line_delims = line_delims
+
+        # The line a \r just ended, so a \n right after it isn't counted too.
+        self._cr_line = None
 
     def __iter__(self):
         return self
@@ -91,8 +116,13 @@ class Reader(object):
 
         self.column += 1
         if c in self._line_delims:
-            self.column -= 1
-            self.line += 1
+            if c == '\n' and self.column == 1 and self._cr_line == self.line:
+                self._cr_line = None
+            else:
+                self.line += 1
+                if c == '\r':
+                    self._cr_line = self.line
+            self.column = 0
 
         return c
 
@@ -108,6 +138,140 @@ class Reader(object):
 
         return c
 
+    def position(self):
+        return (self.source, self.line, self.column)
+
+
+class FormBuffer(object):
+    # Collects input a chunk at a time, e.g. a line per REPL prompt, keeping
+    # enough scanner state that each character is looked at once. Complete
+    # top-level forms are queued as they close and read when iterated.
+    def __init__(self, source=None, start_line=1):
+        self.source = source
+        self.line = start_line
+        self._spans = collections.deque()
+        self.clear()
+
+        # Whether the last chunk ended in \r, which a leading \n completes.
+        self._cr = False
+
+    def reset(self):
+        self._spans.clear()
+        self.clear()
+
+    def clear(self):
+        # Drops the incomplete form, keeping complete ones.
+        self._chunks = []
+        self._start_line = self.line
+
+        self._stack = []
+        self._started = False
+        self._string = False
+        self._escape = False
+        self._char = False
+        self._token = False
+        self._comment = False
+
+    @property
+    def depth(self):
+        return len(self._stack)
+
+    @property
+    def incomplete(self):
+        # True while a form has been started but not finished.
+        return self._started
+
+    def feed(self, text):
+        begin = 0
+        stack = self._stack
+        for i, c in enumerate(text):
+            end = None
+            if self._comment:
+                self._comment = c not in '\r\n'
+            elif self._string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._string = False
+                    if not stack:
+                        end = i + 1
+            elif self._char:
+                # The character after \ is part of the literal whatever
+                # it is.
+                self._char = False
+                self._token = True
+            else:
+                if self._token:
+                    if c not in whitespace and c not in terminating_macros:
+                        continue
+
+                    self._token = False
+                    if not stack:
+                        self._push_span(text[begin:i])
+                        begin = i
+
+                if c in whitespace:
+                    pass
+                elif c == ';':
+                    self._comment = True
+                elif c == '"':
+                    self._started = self._string = True
+                elif c == '\\':
+                    self._started = self._char = True
+                elif c in matching_delimiters:
+                    self._started = True
+                    stack.append(matching_delimiters[c])
+                elif c in closing_delimiters:
+                    if not stack or stack[-1] != c:
+                        # The rest of the chunk is dropped with the form.
+                        self.line += count_lines(text[i:])
+                        self._cr = text.endswith('\r')
+                        self.clear()
+                        raise RuntimeError('Unmatched delimiter: ' + c)
+
+                    stack.pop()
+                    if not stack:
+                        end = i + 1
+                elif c == '\'' or c == '#':
+                    # Complete once the quoted or dispatched form is.
+                    self._started = True
+                else:
+                    self._started = self._token = True
+
+            if end is not None:
+                self._push_span(text[begin:end])
+                begin = end
+
+            if c == '\r':
+                self.line += 1
+            elif c == '\n' and not (text[i - 1] == '\r' if i else self._cr):
+                self.line += 1
+
+        self._cr = text.endswith('\r')
+        self._chunks.append(text[begin:])
+
+    def _push_span(self, text):
+        self._chunks.append(text)
+        self._spans.append((''.join(self._chunks), self._start_line))
+        self._chunks = []
+        self._start_line = self.line
+        self._started = False
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        while self._spans:
+            text, line = self._spans.popleft()
+            r = Reader(iter(text), start_line=line, source=self.source)
+            form = read(r, eof_value=EOF)
+            if form is not EOF:
+                return form
+
+        raise StopIteration
+
 
 def read(reader, eof_is_error=False, eof_value=None):
     try:
@@ -143,15 +307,49 @@ def read(reader, eof_is_error=False, eof_value=None):
             sys.exc_info()[2]  # Include the full stacktrace.
 
 
-def read_string(s):
-    return read(Reader(c for c in s))
+def read_string(s, source=None, consing=False):
+    return read(Reader(iter(s), start_line=1, source=source, consing=consing))
+
+
+def read_all(reader):
+    while True:
+        form = read(reader, eof_value=EOF)
+        if form is EOF:
+            return
+
+        yield form
+
+
+def load_forms(forms, ns, cache=False):
+    ret = None
+    for form in forms:
+        ret = eval(expand(form, ns, cache), ns)
+
+        # (ns foo) switches the namespace the following forms are loaded in.
+        if isinstance(form, list.List) and form and form[0] == NS:
+            ns = ret
+
+    return ret
+
+
+def load_string(s, ns, source=None, consing=False, cache=False):
+    reader = Reader(iter(s), start_line=1, source=source, consing=consing)
+    return load_forms(read_all(reader), ns, cache)
+
+
+def load_file(path, ns, consing=False):
+    # Files are what get edited and reloaded, so only their expansions are
+    # worth caching.
+    with open(path) as f:
+        return load_string(f.read(), ns, source=path, consing=consing,
+                           cache=True)
 
 
 def read_token(reader, c):
     cs = [c]
     while True:
         c = reader.read_one()
-        if c is None or c in whitespace or c in reader_macros:
+        if c is None or c in whitespace or c in terminating_macros:
             reader.push(c)
             return ''.join(cs)
 
@@ -162,7 +360,7 @@ def read_number(reader, c):
     cs = [c]
     while True:
         c = reader.read_one()
-        if c is None or c in whitespace or c in reader_macros:
+        if c is None or c in whitespace or c in terminating_macros:
             reader.push(c)
             break
 
@@ -195,7 +393,7 @@ def read_delimited_list(reader, delimiter):
         if c == delimiter:
             break
 
-        macro = macros.get(c)
+        macro = reader_macros.get(c)
         if macro is not None:
             ret = macro(reader, c)
             if ret is not None and ret is not reader:
@@ -348,29 +546,48 @@ def string_reader(reader, _):
         cs.append(c)
         c = reader.read_one()
 
-    return ''.join(cs)
+    s = ''.join(cs)
+    if reader.consing and type(s) is str:
+        return intern(s)
 
+    return s
 
-def quote_reader(reader, _):
+
+def comment_reader(reader, _):
     c = reader.read_one()
-    token = read_token(reader, c)
-    return list.List([QUOTE, token])
+    while c is not None and c not in '\r\n':
+        c = reader.read_one()
+
+    return reader
+
+
+def quote_reader(reader, _):
+    position = reader.position()
+    form = list.List([QUOTE, read(reader, eof_is_error=True)])
+    form = with_position(form, position)
+    return cons(form) if reader.consing else form
 
 
 def list_reader(reader, _):
+    position = reader.position()
     args = read_delimited_list(reader, ')')
     if len(args) == 0:
-        return list.List()
+        form = list.List()
+    else:
+        form = with_position(list.List(args), position)
 
-    return list.List(args)
+    return cons(form) if reader.consing else form
 
 
 def vector_reader(reader, _):
+    position = reader.position()
     args = read_delimited_list(reader, ']')
     if len(args) == 0:
-        return vector.Vector()
+        form = vector.Vector()
+    else:
+        form = with_position(vector.Vector(args), position)
 
-    return vector.Vector(args)
+    return cons(form) if reader.consing else form
 
 
 def set_reader(reader, _):
@@ -382,11 +599,26 @@ def set_reader(reader, _):
 
 
 def map_reader(reader, _):
+    position = reader.position()
     args = read_delimited_list(reader, '}')
     if len(args) == 0:
         hashmap.HashMap()
 
-    return hashmap.HashMap((k, v) for k, v in zip(args[::2], args[1::2]))
+    m = hashmap.HashMap((k, v) for k, v in zip(args[::2], args[1::2]))
+    m = with_position(m, position)
+    return cons(m) if reader.consing else m
+
+
+def dispatch_reader(reader, _):
+    c = reader.read_one()
+    if c is None:
+        raise RuntimeError('EOF while reading')
+
+    macro_reader = dispatch_macros.get(c)
+    if macro_reader is None:
+        raise RuntimeError('No dispatch macro for: ' + c)
+
+    return macro_reader(reader, c)
 
 
 def unmatched_delimiter_reader(_, delimiter):
@@ -394,18 +626,96 @@ def unmatched_delimiter_reader(_, delimiter):
     raise RuntimeError(msg)
 
 
+matching_delimiters = {'(': ')', '[': ']', '{': '}'}
+closing_delimiters = set(matching_delimiters.itervalues())
+
 reader_macros = {'\\': char_reader,
                  '"': string_reader,
+                 ';': comment_reader,
                  '\'': quote_reader,
                  '(': list_reader,
                  ')': unmatched_delimiter_reader,
                  '[': vector_reader,
                  ']': unmatched_delimiter_reader,
                  '{': map_reader,
-                 '}': unmatched_delimiter_reader}
+                 '}': unmatched_delimiter_reader,
+                 '#': dispatch_reader}
+
+dispatch_macros = {'{': set_reader}
+
+# Like Clojure, # can appear inside a symbol, e.g. foo#.
+terminating_macros = frozenset(reader_macros) - frozenset('#')
 
 macros = {}
 
+# Hash-consed forms read by readers in consing mode.
+consed = weakref.WeakValueDictionary()
+
+# Bumped by defmacro, invalidating cached expansions that depend on the name.
+macro_versions = {}
+
+# Top-level expansions, keyed by namespace and form structure and positions
+# (or identity, for consed forms), so reloading a file only re-expands the
+# forms that changed.
+expansions = {}
+MAX_EXPANSIONS = 4096
+
+# Names checked for macros, and Vars read by the macros that ran, during the
+# expansion currently being cached.
+dependencies = None
+var_reads = None
+
+
+def cons_key(form):
+    # Children are consed before their parents, so a container's structure
+    # is identified by the identities of its children.
+    t = type(form)
+    if t is hashmap.HashMap:
+        return t, frozenset([(child_key(k), child_key(v))
+                             for k, v in form.iteritems()])
+
+    return t, tuple([child_key(f) for f in form])
+
+
+def child_key(x):
+    t = type(x)
+    if t is list.List or t is vector.Vector or t is hashmap.HashMap:
+        return id(x)
+    elif t is float:
+        # 0.0 == -0.0, but they shouldn't be shared.
+        return t, repr(x)
+    elif t is set:
+        return t, frozenset([child_key(y) for y in x])
+
+    return t, x
+
+
+def cons(form):
+    # Identical forms share one object, which keeps the position of the
+    # first occurrence read.
+    key = cons_key(form)
+    existing = consed.get(key)
+    if existing is not None:
+        return existing
+
+    consed[key] = form
+    return form
+
+
+def is_consed(form):
+    try:
+        return consed.get(cons_key(form)) is form
+    except TypeError:
+        return False
+
+
+def with_position(form, position):
+    if position is not None and \
+            isinstance(form, (list.List, vector.Vector, hashmap.HashMap)):
+        form.position = position
+
+    return form
+
 
 def namespace_for(sym, in_ns):
     sym_ns = symbol.Symbol(sym.ns)
@@ -415,102 +725,253 @@ def namespace_for(sym, in_ns):
     return ns
 
 
-def eval(form, ns):
-    while True:
-        if isinstance(form, symbol.Symbol):
-            if form.ns is not None:
-                sym_ns = namespace_for(form, ns)
-                v = sym_ns.find_interned_var(symbol.Symbol(form.name))
-            else:
-                v = ns.find_interned_var(form)
+def eval_time(form, ns):
+    _, expr = form
+    start = profiler.timer()
+    ret = eval(expr, ns)
+    elapsed = profiler.timer() - start
+    sys.stdout.write('"Elapsed time: {:.6f} msecs"\n'.format(elapsed * 1e3))
+    return ret
 
-            if v is None:
-                err_fmt = 'Unable to resolve symbol: {} in this context'
-                raise RuntimeError(err_fmt.format(form))
 
-            return v.root
-        elif not isinstance(form, list.List):
-            return form
-        elif len(form) == 0:
-            return form
-        elif form[0] == DEF:
-            _, sym, val = form
-            v = ns.intern(sym)
-            v.root = eval(val, ns)
-            return v
-        elif form[0] == DO:
-            if len(form) > 1:
-                for f in form[1:-1]:
-                    eval(f, ns)
-                form = form[-1]
-        elif form[0] == IF:
-            if len(form) == 4:
-                _, question, answer, exception = form
-                if rt.bool_cast(eval(question, ns)):
-                    form = answer
+def eval_import(form, ns):
+    ret = None
+    for sym in form[1:]:
+        ret = interop.import_module(sym, ns)
+    return ret
+
+
+def eval_ns(form, ns):
+    import mage.loader as loader  # Avoid circular imports.
+    return loader.define_ns(form)
+
+
+def eval_require(form, ns):
+    import mage.loader as loader  # Avoid circular imports.
+    for spec in form[1:]:
+        loader.require(spec, ns)
+
+
+directives = {TIME: eval_time,
+              IMPORT: eval_import,
+              NS: eval_ns,
+              REQUIRE: eval_require}
+
+
+def eval(form, ns):
+    frame = None
+    try:
+        while True:
+            if isinstance(form, symbol.Symbol):
+                if form.ns is not None:
+                    sym_ns = namespace_for(form, ns)
+                    v = None
+                    if sym_ns is not None:
+                        v = sym_ns.find_interned_var(symbol.Symbol(form.name))
                 else:
-                    form = exception
-            elif len(form) == 3:
-                _, question, answer = form
-                if rt.bool_cast(eval(question, ns)):
-                    form = answer
+                    v = ns.find_interned_var(form)
+
+                if v is None:
+                    # Keywords evaluate to themselves.
+                    if symbol.is_keyword(form):
+                        return form
+
+                    if form.ns is None and '.' in form.name:
+                        obj = interop.resolve_dotted(form, ns)
+                        if obj is not interop.MISSING:
+                            return obj
+
+                    err_fmt = 'Unable to resolve symbol: {} in this context'
+                    raise RuntimeError(err_fmt.format(form))
+
+                if var_reads is not None:
+                    var_reads.add(v)
+                return v.root
+            elif not isinstance(form, list.List):
+                return form
+            elif len(form) == 0:
+                return form
+            elif form[0] == DEF:
+                _, sym, val = form
+                v = ns.intern(sym)
+                v.root = eval(val, ns)
+                if isinstance(v.root, fn.Fn) and v.root.name is None:
+                    v.root.name = v
+                return v
+            elif form[0] == DO:
+                if len(form) > 1:
+                    for f in form[1:-1]:
+                        eval(f, ns)
+                    form = form[-1]
+            elif form[0] == IF:
+                if len(form) == 4:
+                    _, question, answer, exception = form
+                    if rt.bool_cast(eval(question, ns)):
+                        form = answer
+                    else:
+                        form = exception
+                elif len(form) == 3:
+                    _, question, answer = form
+                    if rt.bool_cast(eval(question, ns)):
+                        form = answer
+                    else:
+                        form = None
                 else:
-                    form = None
-            else:
-                raise ReaderError('Wrong number of forms given to if')
-        elif form[0] == QUOTE:
-            _, sym = form
-            return sym
-        elif form[0] == FN:
-            body = None
-            if len(form) == 3:
-                _, params, body = form
+                    raise ReaderError('Wrong number of forms given to if')
+            elif form[0] == QUOTE:
+                _, sym = form
+                return sym
+            elif isinstance(form[0], symbol.Symbol) and \
+                    form[0] in directives:
+                # One hash lookup, rather than a comparison per form, keeps
+                # these rarely used forms off the path of every call.
+                return directives[form[0]](form, ns)
+            elif form[0] == FN:
+                _, arities = form
+                return fn.Fn(arities, ns)
             else:
-                _, params = form
-            return fn.Fn(params, body, ns)
+                func = eval(form[0], ns)
+                args = [eval(f, ns) for f in form[1:]]
+                if isinstance(func, fn.Fn):
+                    if profiler.current is not None:
+                        frame = profiler.current.tail_call(frame, func)
+                    form, ns = func.bind(args)
+                else:
+                    return func(*args)
+    finally:
+        if frame is not None:
+            # Not profiler.current, which may have changed since.
+            frame.owner.leave(frame)
+
+
+def form_key(form):
+    t = type(form)
+    if t is symbol.Symbol:
+        # Symbols only ever equal symbols, so they're their own key.
+        return form
+    elif t is list.List or t is vector.Vector:
+        # Positions are part of the key so the cached expansion carries the
+        # right ones, e.g. for the profiler and sampler.
+        return t, form.position, tuple([form_key(f) for f in form])
+    elif t is hashmap.HashMap:
+        return t, form.position, frozenset([(form_key(k), form_key(v))
+                                            for k, v in form.iteritems()])
+    elif t is set:
+        return t, frozenset([form_key(x) for x in form])
+    elif t is float:
+        # 0.0 == -0.0, but they shouldn't share an expansion.
+        return t, repr(form)
+
+    return t, form
+
+
+def is_macro(sym):
+    if dependencies is not None:
+        dependencies.add(sym)
+
+    return sym in macros
+
+
+def expand(form, ns, cache=False):
+    global dependencies, var_reads
+
+    if not cache or not isinstance(form, list.List):
+        return expand_form(form, ns)
+
+    try:
+        if is_consed(form):
+            # Identical consed forms are the same object, so there's no need
+            # to walk the structure. The entry keeps the form, and so its id,
+            # alive.
+            key = (ns.name, id(form))
         else:
-            current_ns = ns
-            args = list.List(eval(f, ns) for f in form)
-            func = args.pop(0)
-            if isinstance(func, fn.Fn):
-                form = func.body
-                fn_scope_sym = symbol.Symbol('fn__' + str(id(func)))
-                ns = fn.Closure(fn_scope_sym, outer=func.outer)
-                for param, arg in zip(func.params, args):
-                    v = ns.intern(param)
-                    v.root = arg
-            else:
-                ns = current_ns
-                return func(*args)
+            key = (ns.name, form_key(form))
+        cached = expansions.get(key)
+    except TypeError:
+        # Unhashable atoms, e.g. Python objects spliced in by a macro.
+        return expand_form(form, ns)
+
+    if cached is not None:
+        _, expansion, deps, reads = cached
+        if all(macro_versions.get(sym, 0) == version
+               for sym, version in deps) and \
+                all(v.root is root for v, root in reads):
+            if dependencies is not None:
+                dependencies.update(sym for sym, _ in deps)
+                var_reads.update(v for v, _ in reads)
+            return expansion
+
+    outer, dependencies = dependencies, set()
+    outer_reads, var_reads = var_reads, set()
+    try:
+        expansion = expand_form(form, ns)
+        used, read = dependencies, var_reads
+    finally:
+        dependencies, var_reads = outer, outer_reads
+
+    if outer is not None:
+        outer.update(used)
+        outer_reads.update(read)
 
+    if DEFMACRO not in used:
+        if len(expansions) >= MAX_EXPANSIONS:
+            expansions.clear()
 
-def expand(form, ns):
+        # Names that weren't macros are recorded too, at version 0, so a
+        # later defmacro of that name invalidates the entry. A macro's output
+        # can depend on any Var it read, so redefining one does too.
+        deps = tuple((sym, macro_versions.get(sym, 0)) for sym in used)
+        reads = tuple((v, v.root) for v in read)
+        expansions[key] = (form, expansion, deps, reads)
+
+    return expansion
+
+
+def expand_form(form, ns):
     if not isinstance(form, list.List):
         return form
-    elif form[0] == QUOTE:
+    elif form[0] == QUOTE or form[0] == NS or form[0] == REQUIRE:
         return form
     elif form[0] == IF:
-        return list.List(expand(f, ns) for f in form)
+        return with_position(list.List(expand_form(f, ns) for f in form),
+                             form.position)
     elif form[0] == FN:
-        params, body = form[1], form[2:]
-        if not isinstance(params, vector.Vector):
-            raise RuntimeError('Parameter declaration should be a vector')
-
-        for x in params:
-            if not isinstance(x, symbol.Symbol):
-                raise RuntimeError('Unsupported binding form: {}'.format(x))
+        if len(form) == 2 and isinstance(form[1], fn.Arities):
+            return form
 
-        if len(body) == 1:
-            body = body[0]
+        # (fn [x] ...) is shorthand for (fn ([x] ...)).
+        if len(form) > 1 and isinstance(form[1], vector.Vector):
+            overloads = [list.List(form[1:])]
         else:
-            body = list.List([DO] + body)
+            overloads = form[1:]
+
+        if not overloads:
+            raise RuntimeError('Parameter declaration missing')
 
-        return list.List([FN, params, expand(body, ns)])
+        arities = []
+        for overload in overloads:
+            if not isinstance(overload, list.List) or not overload or \
+                    not isinstance(overload[0], vector.Vector):
+                raise RuntimeError('Parameter declaration should be a vector')
+
+            params, rest = expand_params(overload[0])
+
+            body = overload[1:]
+            if len(body) == 1:
+                body = body[0]
+            else:
+                body = with_position(list.List([DO] + body), form.position)
+
+            arities.append(fn.Arity(params, rest, expand_form(body, ns)))
+
+        arities = fn.Arities(arities, form.position)
+        return with_position(list.List([FN, arities]), form.position)
     elif form[0] == DEF:
         _, sym, val = form
         if not isinstance(sym, symbol.Symbol):
             raise RuntimeError('First argument to def must be a Symbol')
-        return list.List([DEF, sym, expand(val, ns)])
+        return with_position(list.List([DEF, sym, expand_form(val, ns)]),
+                             form.position)
     elif form[0] == DEFMACRO:
         body = None
         if len(form) == 3:
@@ -520,9 +981,13 @@ def expand(form, ns):
         else:
             # TODO: Better error.
             raise RuntimeError('Bad macro form')
-        args = expand(args, ns)
-        body = expand(body, ns)
+        args = expand_form(args, ns)
+        body = expand_form(body, ns)
         macros[sym] = eval(body, ns)
+        macro_versions[sym] = macro_versions.get(sym, 0) + 1
+        if dependencies is not None:
+            # Expanding defmacro has side effects, so never cache it.
+            dependencies.add(DEFMACRO)
         return
     elif form[0] == LET:
         body = None
@@ -557,26 +1022,58 @@ def expand(form, ns):
             if i == 0:
                 # Body may be empty.
                 if body is not None:
-                    body = list.List(expand(f, ns) for f in body)
-
-                closure = list.List([FN, param, body])
-                let = list.List([closure]) + list.List([expand(val, ns)])
+                    body = with_position(
+                        list.List(expand_form(f, ns) for f in body),
+                        body.position)
+
+                closure = with_position(list.List([FN, param, body]),
+                                        form.position)
+                let = list.List([closure]) + list.List([expand_form(val, ns)])
+                let = with_position(let, form.position)
                 continue
 
-            closure = list.List([FN, param, let])
-            let = list.List([closure]) + list.List([expand(val, ns)])
-        return expand(let, ns)
+            closure = with_position(list.List([FN, param, let]),
+                                    form.position)
+            let = list.List([closure]) + list.List([expand_form(val, ns)])
+            let = with_position(let, form.position)
+        return expand_form(let, ns)
     elif form[0] == DO:
         if len(form) > 1:
-            return list.List(expand(f, ns) for f in form)
+            return with_position(list.List(expand_form(f, ns) for f in form),
+                                 form.position)
         return
     elif form[0] == SYNTAX_QUOTE:
         return expand_syntax_quote(form)
-    elif isinstance(form[0], symbol.Symbol) and form[0] in macros:
+    elif isinstance(form[0], symbol.Symbol) and is_macro(form[0]):
         macro = macros[form[0]]
-        return expand(macro(*form[1:]), ns)
-
-    return list.List(expand(f, ns) for f in form)
+        expansion = macro(*form[1:])
+        if getattr(expansion, 'position', None) is None:
+            expansion = with_position(expansion, form.position)
+        return expand_form(expansion, ns)
+    elif isinstance(form[0], symbol.Symbol) and interop.is_interop(form[0]):
+        # Resolve interop once, here, rather than on every evaluation.
+        head = interop.call_site(form[0])
+        return with_position(
+            list.List([head] + [expand_form(f, ns) for f in form[1:]]),
+            form.position)
+
+    return with_position(list.List(expand_form(f, ns) for f in form),
+                         form.position)
+
+
+def expand_params(params):
+    for x in params:
+        if not isinstance(x, symbol.Symbol):
+            raise RuntimeError('Unsupported binding form: {}'.format(x))
+
+    if AMPERSAND not in params:
+        return tuple(params), None
+
+    i = params.index(AMPERSAND)
+    if len(params) != i + 2:
+        raise RuntimeError('Invalid parameter list: {}'.format(params))
+
+    return tuple(params[:i]), params[i + 1]
 
 
 def expand_syntax_quote(form):
@@ -0,0 +1,103 @@
+from __future__ import division
+
+import linecache
+import sys
+import threading
+import time
+
+import mage.reader as reader
+
+EVAL_CODE = reader.eval.__code__
+
+
+def form_position(frame):
+    # Only evaluator frames are interesting; everything else on the stack is
+    # either Python glue or a builtin called from mage code.
+    if frame.f_code is not EVAL_CODE:
+        return
+
+    return getattr(frame.f_locals.get('form'), 'position', None)
+
+
+class Sampler(object):
+    def __init__(self, interval=0.01, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples = 0
+        self.own = {}
+        self.total = {}
+        self._running = False
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.current_thread().ident
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run,
+                                        name='mage-sampler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.sample(frame)
+
+    def sample(self, frame):
+        own = None
+        seen = set()
+        while frame is not None:
+            position = form_position(frame)
+            if position is not None:
+                source, line, _ = position
+                key = (source, line)
+                if own is None:
+                    own = key
+                seen.add(key)
+            frame = frame.f_back
+
+        # Samples outside mage code still count towards the total so the
+        # percentages reflect wall time.
+        self.samples += 1
+        if own is not None:
+            self.own[own] = self.own.get(own, 0) + 1
+        for key in seen:
+            self.total[key] = self.total.get(key, 0) + 1
+
+    def hotspots(self):
+        return sorted(((key, self.own.get(key, 0), total)
+                       for key, total in self.total.items()),
+                      key=lambda row: (row[1], row[2]),
+                      reverse=True)
+
+    def report(self, stream=None, limit=20):
+        if stream is None:
+            stream = sys.stdout
+
+        samples = self.samples or 1
+        stream.write('{:>7}  {:>7}  {}\n'.format('self %', 'total %',
+                                                 'location'))
+        for (source, line), own, total in self.hotspots()[:limit]:
+            text = ''
+            if source is not None:
+                text = linecache.getline(source, line).strip()
+
+            stream.write('{:>7.1f}  {:>7.1f}  {}:{}  {}\n'.format(
+                own * 100 / samples, total * 100 / samples,
+                source or 'NO_SOURCE_FILE', line, text))
@@ -0,0 +1,418 @@
+import __builtin__
+import cStringIO
+import fractions
+import struct
+import sys
+
+import mage.hashmap as hashmap
+import mage.list as list
+import mage.symbol as symbol
+import mage.typedvector as typedvector
+import mage.vector as vector
+
+# Tags. Every encoded value starts with one of these bytes.
+NIL = 0x00
+TRUE = 0x01
+FALSE = 0x02
+INT = 0x03
+BIGINT = 0x04
+FLOAT = 0x05
+RATIO = 0x06
+STRING = 0x07
+UNICODE = 0x08
+SYMBOL = 0x09
+SYMBOL_REF = 0x0a
+KEY = 0x0b
+KEY_REF = 0x0c
+LIST = 0x0d
+VECTOR = 0x0e
+MAP = 0x0f
+SET = 0x10
+TYPED_VECTOR = 0x11
+RESET = 0x12
+
+# Integers outside this range are written as BIGINT.
+MAX_INT = 2 ** 63
+
+# Encoders flush to their stream once this many chunks are buffered.
+FLUSH_CHUNKS = 16 * 1024
+
+float_struct = struct.Struct('<d')
+
+small_ints = {}
+for n in xrange(-64, 64):
+    small_ints[n] = chr(INT) + chr((n << 1) ^ (n >> 63))
+
+
+def varint(n):
+    if n < 0x80:
+        return chr(n)
+
+    bs = bytearray()
+    while n >= 0x80:
+        bs.append((n & 0x7f) | 0x80)
+        n >>= 7
+    bs.append(n)
+    return str(bs)
+
+
+class Encoder(object):
+    def __init__(self, stream):
+        self._stream = stream
+        self._out = []
+        self._emit = self._out.append
+        self._symbols = {}
+        self._keys = {}
+
+    def write(self, x):
+        self.encode(x)
+        if len(self._out) >= FLUSH_CHUNKS:
+            self.flush()
+
+    def flush(self):
+        self._stream.write(''.join(self._out))
+        del self._out[:]
+
+    def reset(self):
+        # Both ends forget their caches, bounding memory on long streams.
+        self._symbols.clear()
+        self._keys.clear()
+        self._emit(chr(RESET))
+
+    def encode(self, x):
+        t = type(x)
+        if t is int:
+            s = small_ints.get(x)
+            if s is not None:
+                self._emit(s)
+                return
+
+        encoder = encoders.get(t)
+        if encoder is None:
+            encoder = self._find_encoder(x)
+        encoder(self, x)
+
+    def _find_encoder(self, x):
+        for t, encoder in subclass_encoders:
+            if isinstance(x, t):
+                return encoder
+
+        err_fmt = 'Can\'t serialize {} of type {}'
+        raise TypeError(err_fmt.format(x, type(x).__name__))
+
+    def encode_nil(self, _):
+        self._emit(chr(NIL))
+
+    def encode_bool(self, x):
+        self._emit(chr(TRUE) if x else chr(FALSE))
+
+    def encode_int(self, x):
+        if -MAX_INT <= x < MAX_INT:
+            self._emit(chr(INT) + varint((x << 1) ^ (x >> 63)))
+        else:
+            digits = str(x)
+            self._emit(chr(BIGINT) + varint(len(digits)) + digits)
+
+    def encode_float(self, x):
+        self._emit(chr(FLOAT) + float_struct.pack(x))
+
+    def encode_ratio(self, x):
+        self._emit(chr(RATIO))
+        self.encode_int(x.numerator)
+        self.encode_int(x.denominator)
+
+    def encode_string(self, x):
+        self._emit(chr(STRING) + varint(len(x)) + x)
+
+    def encode_unicode(self, x):
+        s = x.encode('utf-8')
+        self._emit(chr(UNICODE) + varint(len(s)) + s)
+
+    def encode_symbol(self, x):
+        index = self._symbols.get(x)
+        if index is not None:
+            self._emit(chr(SYMBOL_REF) + varint(index))
+            return
+
+        self._symbols[x] = len(self._symbols)
+        ns = '' if x.ns is None else x.ns
+        self._emit(chr(SYMBOL) + varint(len(ns) + (x.ns is not None)) + ns +
+                   varint(len(x.name)) + x.name)
+
+    def encode_key(self, x):
+        # Map keys repeat across maps, so strings in key position are cached
+        # like symbols.
+        if not isinstance(x, basestring):
+            self.encode(x)
+            return
+
+        # Keyed on type too, otherwise 'a' and u'a' would share an entry.
+        cache_key = (type(x), x)
+        index = self._keys.get(cache_key)
+        if index is not None:
+            self._emit(chr(KEY_REF) + varint(index))
+            return
+
+        self._keys[cache_key] = len(self._keys)
+        self._emit(chr(KEY))
+        self.encode(x)
+
+    def encode_items(self, tag, xs):
+        self._emit(chr(tag) + varint(len(xs)))
+        encode = self.encode
+        for x in xs:
+            encode(x)
+
+    def encode_list(self, xs):
+        self.encode_items(LIST, xs)
+
+    def encode_vector(self, xs):
+        self.encode_items(VECTOR, xs)
+
+    def encode_set(self, xs):
+        self.encode_items(SET, xs)
+
+    def encode_map(self, m):
+        self._emit(chr(MAP) + varint(len(m)))
+        encode = self.encode
+        for k, v in m.iteritems():
+            if type(k) is symbol.Symbol:
+                self.encode_symbol(k)
+            else:
+                self.encode_key(k)
+            encode(v)
+
+    def encode_typed_vector(self, xs):
+        if sys.byteorder != 'little':
+            xs = typedvector.TypedVector(xs.typecode, xs)
+            xs.byteswap()
+
+        raw = xs.tostring()
+        self._emit(chr(TYPED_VECTOR) + xs.typecode + varint(len(raw)) + raw)
+
+
+encoders = {type(None): Encoder.encode_nil,
+            bool: Encoder.encode_bool,
+            int: Encoder.encode_int,
+            long: Encoder.encode_int,
+            float: Encoder.encode_float,
+            fractions.Fraction: Encoder.encode_ratio,
+            str: Encoder.encode_string,
+            unicode: Encoder.encode_unicode,
+            symbol.Symbol: Encoder.encode_symbol,
+            list.List: Encoder.encode_list,
+            vector.Vector: Encoder.encode_vector,
+            hashmap.HashMap: Encoder.encode_map,
+            set: Encoder.encode_set,
+            frozenset: Encoder.encode_set,
+            typedvector.TypedVector: Encoder.encode_typed_vector}
+
+# Checked in order when a value's exact type has no encoder.
+subclass_encoders = [(list.List, Encoder.encode_list),
+                     (vector.Vector, Encoder.encode_vector),
+                     (dict, Encoder.encode_map),
+                     (typedvector.TypedVector, Encoder.encode_typed_vector),
+                     ((tuple, __builtin__.list), Encoder.encode_list)]
+
+
+class Decoder(object):
+    def __init__(self, stream, buffer_size=64 * 1024):
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._buf = ''
+        self._pos = 0
+        self._symbols = []
+        self._keys = []
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        if not self._fill(1):
+            raise StopIteration
+
+        return self.read()
+
+    def _fill(self, n):
+        # Make sure at least n bytes past the current position are buffered.
+        available = len(self._buf) - self._pos
+        while available < n:
+            chunk = self._stream.read(max(n - available, self._buffer_size))
+            if not chunk:
+                return False
+
+            self._buf = self._buf[self._pos:] + chunk
+            self._pos = 0
+            available = len(self._buf)
+
+        return True
+
+    def _take(self, n):
+        if len(self._buf) - self._pos < n and not self._fill(n):
+            raise EOFError('Unexpected end of serialized data')
+
+        start = self._pos
+        self._pos += n
+        return self._buf[start:self._pos]
+
+    def _byte(self):
+        if self._pos >= len(self._buf) and not self._fill(1):
+            raise EOFError('Unexpected end of serialized data')
+
+        c = self._buf[self._pos]
+        self._pos += 1
+        return ord(c)
+
+    def _varint(self):
+        pos = self._pos
+        if pos < len(self._buf):
+            n = ord(self._buf[pos])
+            self._pos = pos + 1
+        else:
+            n = self._byte()
+        if n < 0x80:
+            return n
+
+        n &= 0x7f
+        shift = 7
+        while True:
+            b = self._byte()
+            n |= (b & 0x7f) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def read(self):
+        pos = self._pos
+        if pos < len(self._buf):
+            tag = ord(self._buf[pos])
+            self._pos = pos + 1
+        else:
+            tag = self._byte()
+
+        while tag == RESET:
+            del self._symbols[:]
+            del self._keys[:]
+            tag = self._byte()
+
+        try:
+            decoder = decoders[tag]
+        except IndexError:
+            raise ValueError('Unknown tag: {}'.format(tag))
+
+        return decoder(self)
+
+    def read_nil(self):
+        return None
+
+    def read_true(self):
+        return True
+
+    def read_false(self):
+        return False
+
+    def read_int(self):
+        n = self._varint()
+        return (n >> 1) ^ -(n & 1)
+
+    def read_bigint(self):
+        return int(self._take(self._varint()))
+
+    def read_float(self):
+        return float_struct.unpack(self._take(8))[0]
+
+    def read_ratio(self):
+        numerator = self.read()
+        return fractions.Fraction(numerator, self.read())
+
+    def read_string(self):
+        return self._take(self._varint())
+
+    def read_unicode(self):
+        return self._take(self._varint()).decode('utf-8')
+
+    def read_symbol(self):
+        n = self._varint()
+        ns = self._take(n - 1) if n > 0 else None
+        sym = symbol.Symbol.intern(self._take(self._varint()), ns)
+        self._symbols.append(sym)
+        return sym
+
+    def read_symbol_ref(self):
+        return self._symbols[self._varint()]
+
+    def read_key(self):
+        key = self.read()
+        self._keys.append(key)
+        return key
+
+    def read_key_ref(self):
+        return self._keys[self._varint()]
+
+    def read_list(self):
+        read = self.read
+        return list.List([read() for _ in xrange(self._varint())])
+
+    def read_vector(self):
+        read = self.read
+        return vector.Vector([read() for _ in xrange(self._varint())])
+
+    def read_map(self):
+        read = self.read
+        m = hashmap.HashMap()
+        for _ in xrange(self._varint()):
+            k = read()
+            m[k] = read()
+        return m
+
+    def read_set(self):
+        read = self.read
+        return set(read() for _ in xrange(self._varint()))
+
+    def read_typed_vector(self):
+        typecode = self._take(1)
+        xs = typedvector.TypedVector(typecode)
+        xs.fromstring(self._take(self._varint()))
+        if sys.byteorder != 'little':
+            xs.byteswap()
+        return xs
+
+
+decoders = [Decoder.read_nil,
+            Decoder.read_true,
+            Decoder.read_false,
+            Decoder.read_int,
+            Decoder.read_bigint,
+            Decoder.read_float,
+            Decoder.read_ratio,
+            Decoder.read_string,
+            Decoder.read_unicode,
+            Decoder.read_symbol,
+            Decoder.read_symbol_ref,
+            Decoder.read_key,
+            Decoder.read_key_ref,
+            Decoder.read_list,
+            Decoder.read_vector,
+            Decoder.read_map,
+            Decoder.read_set,
+            Decoder.read_typed_vector]
+
+
+def dump(x, stream):
+    encoder = Encoder(stream)
+    encoder.write(x)
+    encoder.flush()
+
+
+def dumps(x):
+    stream = cStringIO.StringIO()
+    dump(x, stream)
+    return stream.getvalue()
+
+
+def load(stream):
+    return Decoder(stream).read()
+
+
+def loads(s):
+    return load(cStringIO.StringIO(s))
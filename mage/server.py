@@ -0,0 +1,357 @@
+from __future__ import print_function
+
+import argparse
+import cStringIO
+import errno
+import gc
+import os
+import select
+import signal
+import socket
+import stat
+import struct
+import sys
+import time
+import traceback
+
+import mage.namespace as namespace
+import mage.printer as printer
+import mage.reader as reader
+import mage.serialize as serialize
+import mage.symbol as symbol
+
+# Requests are a format byte, a 4-byte big-endian length and a payload:
+# mage source for TEXT, or a form encoded with mage.serialize for BINARY.
+TEXT = 't'
+BINARY = 'b'
+
+# Responses are a status byte followed by two length-prefixed payloads: the
+# value (printed for TEXT requests, serialized for BINARY ones) or an error
+# message, then whatever was written to stdout while evaluating.
+OK = 'o'
+ERROR = 'e'
+TIMEOUT = 't'
+
+LENGTH = struct.Struct('>I')
+
+# A worker writes this to its pipe to the master when it accepts a request.
+STARTED = 's'
+
+# How long past the timeout the master waits before killing a worker that
+# hasn't answered, e.g. because it is stuck in a C call that SIGALRM can't
+# interrupt.
+KILL_GRACE = 1.0
+
+USER_NS = symbol.Symbol('user')
+
+
+class EvalError(RuntimeError):
+    def __init__(self, message, output=''):
+        super(EvalError, self).__init__(message)
+        self.output = output
+
+
+class Timeout(EvalError):
+    pass
+
+
+def recv_exactly(sock, n):
+    chunks = []
+    while n > 0:
+        chunk = sock.recv(n)
+        if not chunk:
+            raise EOFError('Connection closed')
+
+        chunks.append(chunk)
+        n -= len(chunk)
+
+    return ''.join(chunks)
+
+
+def recv_payload(sock):
+    n, = LENGTH.unpack(recv_exactly(sock, LENGTH.size))
+    return recv_exactly(sock, n)
+
+
+def pack_payload(payload):
+    return LENGTH.pack(len(payload)) + payload
+
+
+def alarm(signum, frame):
+    raise Timeout('Evaluation timed out')
+
+
+class Server(object):
+    def __init__(self, path, preload=(), workers=4, timeout=5.0, ns=USER_NS):
+        self.path = path
+        self.preload = preload
+        self.workers = workers
+        self.timeout = timeout
+        self.ns = namespace.Namespace.find_or_create(ns)
+
+        self._sock = None
+        self._pids = set()
+
+        # Read ends of the workers' pipes, and when each busy worker started
+        # its request.
+        self._pipes = {}
+        self._started = {}
+
+    def warm(self):
+        for path in self.preload:
+            reader.load_file(path, self.ns)
+
+        # Workers share the warmed heap copy-on-write; don't leave garbage
+        # for each of them to collect.
+        gc.collect()
+
+    def serve_forever(self):
+        self.warm()
+
+        if os.path.exists(self.path):
+            if not stat.S_ISSOCK(os.stat(self.path).st_mode):
+                raise RuntimeError('Not a socket: {}'.format(self.path))
+            os.unlink(self.path)
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        self._sock.listen(128)
+
+        previous = signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            for _ in xrange(self.workers):
+                self.spawn()
+
+            while True:
+                self.watch()
+                self.kill_overdue()
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            self.shutdown()
+
+    def watch(self):
+        # Wakes when a worker starts a request or exits, closing its pipe, or
+        # when the earliest busy worker is due to be killed.
+        wait = None
+        if self._started:
+            deadline = min(self._started.itervalues()) + \
+                self.timeout + KILL_GRACE
+            wait = max(0, deadline - time.time())
+
+        try:
+            ready, _, _ = select.select(self._pipes.keys(), [], [], wait)
+        except select.error as e:
+            if e.args[0] == errno.EINTR:
+                return
+            raise
+
+        for fd in ready:
+            pid = self._pipes[fd]
+            if os.read(fd, 1) == STARTED:
+                self._started[pid] = time.time()
+            else:
+                # The worker has exited, or is about to.
+                os.close(fd)
+                del self._pipes[fd]
+                self.reap(pid)
+
+    def kill_overdue(self):
+        now = time.time()
+        for pid, started in self._started.items():
+            if now - started > self.timeout + KILL_GRACE:
+                del self._started[pid]
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+
+    def reap(self, pid):
+        while True:
+            try:
+                os.waitpid(pid, 0)
+                break
+            except OSError as e:
+                if e.errno != errno.EINTR:
+                    raise
+
+        # Each worker serves a single request, so nothing one request does
+        # to the heap is seen by the next.
+        self._started.pop(pid, None)
+        self._pids.discard(pid)
+        self.spawn()
+
+    def shutdown(self):
+        for pid in self._pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+        for pid in self._pids:
+            try:
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+
+        self._pids.clear()
+        self._started.clear()
+
+        for fd in self._pipes:
+            os.close(fd)
+        self._pipes.clear()
+
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            os.unlink(self.path)
+
+    def spawn(self):
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid:
+            os.close(w)
+            self._pids.add(pid)
+            self._pipes[r] = pid
+            return
+
+        status = 0
+        try:
+            os.close(r)
+            for fd in self._pipes:
+                os.close(fd)
+
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            gc.disable()
+            self.work(w)
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            # Never return into the master's loop.
+            os._exit(status)
+
+    def work(self, notify):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+                break
+            except socket.error as e:
+                if e.errno != errno.EINTR:
+                    raise
+
+        self._sock.close()
+        os.write(notify, STARTED)
+
+        # The timeout covers reading the request and sending the response
+        # too, so a client that stalls can't hold on to the worker.
+        signal.signal(signal.SIGALRM, alarm)
+        signal.setitimer(signal.ITIMER_REAL, self.timeout)
+        try:
+            fmt = recv_exactly(conn, 1)
+            payload = recv_payload(conn)
+            conn.sendall(self.handle(fmt, payload))
+        except Timeout:
+            pass
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            conn.close()
+
+    def handle(self, fmt, payload):
+        stdout = sys.stdout
+        sys.stdout = out = cStringIO.StringIO()
+
+        try:
+            if fmt == TEXT:
+                value = printer.pr_str(reader.load_string(payload, self.ns))
+            elif fmt == BINARY:
+                form = reader.expand(serialize.loads(payload), self.ns)
+                value = serialize.dumps(reader.eval(form, self.ns))
+            else:
+                raise ValueError('Unknown request format: {!r}'.format(fmt))
+            status = OK
+        except Timeout as e:
+            status, value = TIMEOUT, str(e)
+        except Exception:
+            status, value = ERROR, traceback.format_exc()
+        finally:
+            sys.stdout = stdout
+
+        return status + pack_payload(value) + pack_payload(out.getvalue())
+
+
+class Client(object):
+    def __init__(self, path):
+        self.path = path
+
+    def request(self, fmt, payload):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+            sock.sendall(fmt + pack_payload(payload))
+            status = recv_exactly(sock, 1)
+            value = recv_payload(sock)
+            output = recv_payload(sock)
+        finally:
+            sock.close()
+
+        if status == TIMEOUT:
+            raise Timeout(value, output)
+        elif status != OK:
+            raise EvalError(value, output)
+
+        return value, output
+
+    def eval(self, source):
+        return self.request(TEXT, source)
+
+    def eval_form(self, form):
+        value, output = self.request(BINARY, serialize.dumps(form))
+        return serialize.loads(value), output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m mage.server')
+    commands = parser.add_subparsers(dest='command')
+
+    serve = commands.add_parser('serve', help='run a server')
+    serve.add_argument('path', help='Unix socket to listen on')
+    serve.add_argument('-l', '--load', dest='preload', action='append',
+                       default=[], help='load this file before forking')
+    serve.add_argument('-w', '--workers', type=int, default=4)
+    serve.add_argument('-t', '--timeout', type=float, default=5.0,
+                       help='seconds allowed per request')
+
+    client = commands.add_parser('eval', help='evaluate source on a server')
+    client.add_argument('path', help='Unix socket to connect to')
+    client.add_argument('source', nargs='?', default='-',
+                        help='mage source, or - to read stdin')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        server = Server(args.path, args.preload, args.workers, args.timeout)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    source = args.source
+    if source == '-':
+        source = sys.stdin.read()
+
+    try:
+        value, output = Client(args.path).eval(source)
+    except EvalError as e:
+        sys.stdout.write(e.output)
+        print(str(e).rstrip('\n'), file=sys.stderr)
+        return 1
+
+    sys.stdout.write(output)
+    print(value)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
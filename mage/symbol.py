@@ -1,10 +1,20 @@
+import weakref
+
+# Symbols are immutable, so Symbol.intern hands out one shared instance per
+# name for as long as anything refers to it.
+interned = weakref.WeakValueDictionary()
+
+
 class Symbol(object):
+    __slots__ = ('name', 'ns', '_hash', '__weakref__')
+
     def __init__(self, name, ns=None):
         if ns is not None:
             assert isinstance(ns, str)
 
         self.name = name
         self.ns = ns
+        self._hash = hash(ns) ^ hash(name)
 
     def __str__(self):
         if self.ns is None:
@@ -13,13 +23,19 @@ class Symbol(object):
         return self.ns + '/' + self.name
 
     def __eq__(self, other):
+        if self is other:
+            return True
+
         if not isinstance(other, Symbol):
             return False
 
-        return self.ns is other.ns and self.name == other.name
+        return self.ns == other.ns and self.name == other.name
+
+    def __ne__(self, other):
+        return not self == other
 
     def __hash__(self):
-        return hash(self.ns) ^ hash(self.name)
+        return self._hash
 
     @staticmethod
     def intern(name, ns=None):
@@ -31,9 +47,15 @@ class Symbol(object):
                 return name
 
             index = name.find('/')
-            if index == -1 or name == '/':
-                return Symbol(name)
+            if index != -1 and name != '/':
+                ns, name = name.split('/', 1)
+
+        sym = interned.get((ns, name))
+        if sym is None:
+            sym = interned[(ns, name)] = Symbol(name, ns)
+
+        return sym
 
-            ns, name = name.split('/', 1)
 
-        return Symbol(name, ns)
+def is_keyword(sym):
+    return (sym.ns or sym.name).startswith(':')
@@ -0,0 +1,125 @@
+import array
+import itertools
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+TYPES = {':double': 'd',
+         ':float': 'f',
+         ':long': 'l',
+         ':int': 'i',
+         ':short': 'h',
+         ':byte': 'b'}
+
+FLOATS = 'df'
+
+
+class TypedVector(array.array):
+    def __str__(self):
+        import mage.printer as printer  # Avoid circular imports.
+        return printer.to_str(self)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._wrap(array.array.__getitem__(self, i))
+        return array.array.__getitem__(self, i)
+
+    def __getslice__(self, i, j):
+        return self._wrap(array.array.__getslice__(self, i, j))
+
+    def _wrap(self, a):
+        # Copied as raw bytes rather than an item at a time.
+        return TypedVector(self.typecode, a.tostring())
+
+
+def vector_of(t, *xs):
+    typecode = TYPES.get(str(t))
+    if typecode is None:
+        raise ValueError('Unsupported vector-of type: {}'.format(t))
+
+    return TypedVector(typecode, xs)
+
+
+def operands(a, b):
+    if not isinstance(b, array.array):
+        return itertools.repeat(b)
+
+    if len(a) != len(b):
+        err_fmt = 'Vectors must have the same length ({} and {})'
+        raise ValueError(err_fmt.format(len(a), len(b)))
+
+    return b
+
+
+def result_type(a, b):
+    # Mixing in floats promotes to double. Integer results are always long,
+    # since even two :byte vectors can sum past what a byte holds.
+    if a.typecode in FLOATS:
+        if not isinstance(b, array.array) or b.typecode == a.typecode:
+            return a.typecode
+        return 'd'
+
+    if isinstance(b, array.array):
+        return 'd' if b.typecode in FLOATS else 'l'
+    return 'd' if isinstance(b, float) else 'l'
+
+
+def vector_first(a, b):
+    # Both operations commute, so a scalar can come first.
+    if not isinstance(a, array.array):
+        return b, a
+    return a, b
+
+
+# All of the following loop in C: itertools and operator do the iteration and
+# arithmetic, and array builds the result without boxing into a list first.
+def add(a, b):
+    a, b = vector_first(a, b)
+    return TypedVector(result_type(a, b), itertools.imap(operator.add, a,
+                                                         operands(a, b)))
+
+
+def mul(a, b):
+    a, b = vector_first(a, b)
+    return TypedVector(result_type(a, b), itertools.imap(operator.mul, a,
+                                                         operands(a, b)))
+
+
+def ndarray(a):
+    # A view over the array's buffer; nothing is copied.
+    return numpy.frombuffer(a, dtype=a.typecode)
+
+
+def floats(a):
+    # NumPy wraps integer sums on overflow; Python's don't.
+    return isinstance(a, array.array) and a.typecode in FLOATS
+
+
+def vsum(a):
+    if numpy is not None and floats(a) and len(a) > 0:
+        return ndarray(a).sum().item()
+
+    return sum(a)
+
+
+def dot(a, b):
+    if numpy is not None and floats(a) and floats(b) and len(a) > 0:
+        operands(a, b)
+        return ndarray(a).dot(ndarray(b)).item()
+
+    return sum(itertools.imap(operator.mul, a, operands(a, b)))
+
+
+def vmap(f, a):
+    if a.typecode in FLOATS:
+        return TypedVector(a.typecode, itertools.imap(f, a))
+
+    # f may return floats from integers, e.g. sqrt, or integers too large for
+    # the original type.
+    xs = map(f, a)
+    if any(isinstance(x, float) for x in xs):
+        return TypedVector('d', xs)
+    return TypedVector('l', xs)
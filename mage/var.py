@@ -2,6 +2,8 @@ import mage.symbol as symbol
 
 
 class Var(object):
+    __slots__ = ('sym', 'root', 'ns')
+
     def __init__(self, sym=None, root=None, ns=None):
         if sym is not None:
             assert isinstance(sym, symbol.Symbol)
@@ -1,3 +1,5 @@
-class Vector(list):
-    def __str__(self):
-        return '[' + ' '.join(map(str, self)) + ']'
+import mage.form as form
+
+
+class Vector(form.Form, list):
+    __slots__ = form.SLOTS
@@ -3,43 +3,21 @@ import readline
 import os
 import traceback
 
+import mage.printer as printer
 import mage.reader as reader
 import mage.symbol as symbol
 import mage.namespace as namespace
 
 
-def unbalanced(line):
-    parens = {'(', '{', '['}
-    matches = {')': '(', '}': '{', ']': '['}
-    stack = []
-
-    for c in line:
-        if c in parens:
-            stack.append(c)
-
-        if c in matches:
-            if not stack:
-                raise RuntimeError('Unmatched delimiter: ' + c)
-
-            if not stack[-1] == matches.get(c):
-                raise RuntimeError('Unmatched delimiter: ' + c)
-
-            stack.pop()
-
-    return bool(stack)
-
-
 class Completer(object):
     def __init__(self, ns):
         self.prefix = None
-        self.match_symbols = []
+        self.matching_symbols = []
         self.ns = ns
 
     def complete(self, prefix, index):
         if prefix != self.prefix:
-            symbols = self.ns._mappings.items()
-            self.matching_symbols = \
-                [s.name for s, v in symbols if s.name.startswith(prefix)]
+            self.matching_symbols = self.ns.complete(prefix)
             self.prefix = prefix
 
         try:
@@ -67,35 +45,61 @@ if __name__ == '__main__':
 
     completer = Completer(repl_ns)
     readline.parse_and_bind('tab: complete')
+
+    # Only break words where symbols end, so alias/prefix completes whole.
+    readline.set_completer_delims(' \t\n,()[]{}"\';\\')
     readline.set_completer(completer.complete)
 
     # Version message.
     print 'Mage 0.0.1\n'
 
+    forms = reader.FormBuffer()
+
     while True:
         try:
-            line = raw_input(str(repl_ns) + '=> ')
+            if forms.incomplete:
+                line = raw_input(' ' * len(str(repl_ns)) + '.. ')
+            else:
+                line = raw_input(str(repl_ns) + '=> ')
 
-            if line in ('exit', 'quit'):
-                print 'Bye for now!'
-                break
+                if line in ('exit', 'quit'):
+                    print 'Bye for now!'
+                    break
 
-            while unbalanced(line):
-                line += '\n' + raw_input(' ' * len(str(repl_ns)) + '.. ')
-
-            # Evaluation involves three steps:
-            #
-            #   1. Tokenize a string.
-            #   2. Expand tokens. (Macro expansion, error checking.)
-            #   3. Eval expanded tokens.
-            parsed = reader.read_string(line)
-            expanded = reader.expand(parsed, repl_ns)
-            evaled = reader.eval(expanded, repl_ns)
-            if evaled is None:
-                print 'nil'
-            else:
-                print evaled
+            forms.feed(line + '\n')
+        except EOFError:
+            print
+            break
         except KeyboardInterrupt:
             print '\n'
+            forms.reset()
+            continue
         except Exception:
             traceback.print_exc()
+            continue
+
+        # Every form completed by this line is evaluated, in three steps:
+        #
+        #   1. Read a form.
+        #   2. Expand it. (Macro expansion, error checking.)
+        #   3. Eval the expanded form.
+        while True:
+            try:
+                parsed = next(forms, reader.EOF)
+                if parsed is reader.EOF:
+                    break
+
+                expanded = reader.expand(parsed, repl_ns)
+                evaled = reader.eval(expanded, repl_ns)
+                printer.prn(evaled)
+
+                # (ns foo) switches to foo.
+                if isinstance(parsed, list) and parsed and \
+                        parsed[0] == reader.NS:
+                    repl_ns = completer.ns = evaled
+            except KeyboardInterrupt:
+                print '\n'
+                forms.reset()
+                break
+            except Exception:
+                traceback.print_exc()